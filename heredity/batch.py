@@ -0,0 +1,202 @@
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from functools import lru_cache, partial
+from multiprocessing import Pool
+
+from compiled import CompiledFamily
+from elimination import variable_elimination
+from heredity import load_data
+
+METHODS = ["compiled", "elimination"]
+CSV_FIELDS = ["file", "person", "gene_2", "gene_1", "gene_0",
+              "trait_true", "trait_false", "seconds", "cached", "error"]
+
+
+def main():
+    if len(sys.argv) not in [3, 4, 5]:
+        sys.exit("Usage: python batch.py directory|glob output.{csv,jsonl} "
+                 "[method] [processes]")
+    files = family_files(sys.argv[1])
+    output = sys.argv[2]
+    method = sys.argv[3] if len(sys.argv) > 3 else "compiled"
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    if method not in METHODS:
+        sys.exit(f"Method must be one of: {', '.join(METHODS)}")
+
+    start = time.perf_counter()
+    count, failures = run_batch(files, output, method, processes)
+    print(f"Processed {count} families in {time.perf_counter() - start:.2f}s")
+    if failures:
+        print(f"{len(failures)} failed:")
+        for filename, error in failures:
+            print(f"  {filename}: {error}")
+        sys.exit(1)
+
+
+def family_files(pattern):
+    """
+    Return the sorted CSV files matching `pattern`, which is either a
+    directory or a glob.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.csv")
+    return sorted(glob.glob(pattern))
+
+
+def structure_key(people):
+    """
+    Return a hashable description of the shape of a family: for each
+    person, in file order, the positions of their parents and their known
+    trait. Families with the same key have the same distributions,
+    position by position, whatever their names.
+
+    Raise ValueError if a parent is not in the family, rather than
+    treating the child as a founder.
+    """
+    index = {name: i for i, name in enumerate(people)}
+
+    def position(person, parent):
+        name = people[person][parent]
+        if name is None:
+            return None
+        if name not in index:
+            raise ValueError(f"{parent} {name!r} of {person!r} not in family")
+        return index[name]
+
+    return tuple(
+        (position(person, "mother"), position(person, "father"), data["trait"])
+        for person, data in people.items()
+    )
+
+
+def anonymous_family(key):
+    """
+    Return a family in the format returned by `load_data` with the shape
+    `key`, naming each person by their position.
+    """
+    return {
+        i: {
+            "name": i,
+            "mother": mother,
+            "father": father,
+            "trait": trait
+        }
+        for i, (mother, father, trait) in enumerate(key)
+    }
+
+
+@lru_cache(maxsize=None)
+def shape_probabilities(key, method):
+    """
+    Return the distributions of every position in families of shape
+    `key`, as a list in file order, computing them at most once per shape
+    in this process.
+    """
+    if method == "compiled":
+        probabilities = CompiledFamily(anonymous_family(key)).probabilities()
+    else:
+        probabilities = variable_elimination(anonymous_family(key))
+    return [probabilities[i] for i in range(len(key))]
+
+
+def process_family(filename, method):
+    """
+    Load the family in `filename` and return a result dictionary with its
+    per-person distributions, the time taken and whether the shape was
+    already cached. If the family cannot be loaded or computed, the
+    result has an "error" message instead, so one bad file does not stop
+    the batch.
+    """
+    start = time.perf_counter()
+    try:
+        people = load_data(filename)
+        key = structure_key(people)
+        cached = shape_probabilities.cache_info().hits
+        distributions = shape_probabilities(key, method)
+    except Exception as e:
+        return {
+            "file": filename,
+            "seconds": time.perf_counter() - start,
+            "error": f"{type(e).__name__}: {e}"
+        }
+    cached = shape_probabilities.cache_info().hits > cached
+    return {
+        "file": filename,
+        "seconds": time.perf_counter() - start,
+        "cached": cached,
+        "probabilities": dict(zip(people, distributions))
+    }
+
+
+def write_result(writer, result, jsonl):
+    """
+    Write one family's result as a JSON line or as one CSV row per person,
+    or a failed family's error as one line or row.
+    """
+    if "error" in result:
+        if jsonl:
+            writer.write(json.dumps(result))
+            writer.write("\n")
+        else:
+            writer.writerow({"file": result["file"],
+                             "seconds": result["seconds"],
+                             "error": result["error"]})
+        return
+    if jsonl:
+        probabilities = {
+            person: {
+                "gene": {str(g): p for g, p in fields["gene"].items()},
+                "trait": {str(t).lower(): p
+                          for t, p in fields["trait"].items()}
+            }
+            for person, fields in result["probabilities"].items()
+        }
+        writer.write(json.dumps({**result, "probabilities": probabilities}))
+        writer.write("\n")
+        return
+    for person, fields in result["probabilities"].items():
+        writer.writerow({
+            "file": result["file"],
+            "person": person,
+            "gene_2": fields["gene"][2],
+            "gene_1": fields["gene"][1],
+            "gene_0": fields["gene"][0],
+            "trait_true": fields["trait"][True],
+            "trait_false": fields["trait"][False],
+            "seconds": result["seconds"],
+            "cached": result["cached"]
+        })
+
+
+def run_batch(files, output, method="compiled", processes=None):
+    """
+    Compute the distributions of every family in `files` on a pool of
+    `processes` workers, streaming results to `output` as they complete.
+    `output` is written as JSON lines if it ends in ".jsonl" or ".json",
+    and as CSV otherwise. Return the number of families processed and a
+    list of (filename, error) pairs for the families that failed.
+    """
+    jsonl = output.endswith((".jsonl", ".json"))
+    count = 0
+    failures = []
+    with open(output, "w", newline="") as f, Pool(processes) as pool:
+        writer = f if jsonl else csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        if not jsonl:
+            writer.writeheader()
+        results = pool.imap_unordered(
+            partial(process_family, method=method), files, chunksize=16
+        )
+        for result in results:
+            write_result(writer, result, jsonl)
+            count += 1
+            if "error" in result:
+                failures.append((result["file"], result["error"]))
+    return count, sorted(failures)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import json
+import sys
+import time
+import tracemalloc
+
+from compiled import CompiledFamily
+from elimination import variable_elimination
+from heredity import (DATA_FILES, enumerate_probabilities, load_data,
+                      max_difference)
+from parallel import parallel_probabilities
+from pedigree import random_pedigree
+from sampling import gibbs_sampling, likelihood_weighting
+
+SIZES = [6, 8, 25, 50]
+OBSERVED = 0.5
+SAMPLES = 5000
+ENUMERATION_LIMIT = 8
+SAMPLING_LIMIT = 100
+TOLERANCE = 1e-9
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py output.json [size ...]")
+    sizes = [int(size) for size in sys.argv[2:]] or SIZES
+    results = run_benchmarks(sizes)
+    with open(sys.argv[1], "w") as f:
+        json.dump(results, f, indent=2)
+    for result in results:
+        print(f"{result['family']} ({result['people']} people):")
+        for name, measurement in result["strategies"].items():
+            check = "ok" if measurement["agrees"] else "MISMATCH"
+            print(f"  {name}: {measurement['seconds']:.4f}s, "
+                  f"peak {measurement['peak_bytes'] / 1024:.0f} KiB, "
+                  f"max difference {measurement['max_difference']:.1e} "
+                  f"({check})")
+
+
+def powerset_enumeration(people):
+    return enumerate_probabilities(people, pruned=False)
+
+
+def pruned_enumeration(people):
+    return enumerate_probabilities(people)
+
+
+def log_space_enumeration(people):
+    return enumerate_probabilities(people, log_space=True)
+
+
+def compiled_enumeration(people):
+    return CompiledFamily(people).probabilities()
+
+
+def batch_enumeration(people):
+    return CompiledFamily(people).batch_probabilities()
+
+
+def log_space_elimination(people):
+    return variable_elimination(people, log_space=True)
+
+
+def weighted_sampling(people):
+    return likelihood_weighting(people, SAMPLES, seed=0)[0]
+
+
+def gibbs(people):
+    return gibbs_sampling(people, SAMPLES, seed=0)[0]
+
+
+# Each strategy with whether it is exact and the largest family it is run on
+STRATEGIES = [
+    ("enumeration (powerset)", powerset_enumeration, True, ENUMERATION_LIMIT),
+    ("enumeration (pruned)", pruned_enumeration, True, ENUMERATION_LIMIT),
+    ("enumeration (log space)", log_space_enumeration, True,
+     ENUMERATION_LIMIT),
+    ("compiled", compiled_enumeration, True, ENUMERATION_LIMIT),
+    ("compiled batch", batch_enumeration, True, ENUMERATION_LIMIT),
+    ("parallel", parallel_probabilities, True, ENUMERATION_LIMIT),
+    ("elimination", variable_elimination, True, None),
+    ("elimination (log space)", log_space_elimination, True, None),
+    ("likelihood weighting", weighted_sampling, False, SAMPLING_LIMIT),
+    ("gibbs sampling", gibbs, False, SAMPLING_LIMIT)
+]
+
+
+def measure(function, people):
+    """
+    Return `function(people)`, its wall time in seconds and the peak memory
+    traced while it ran, in bytes. Memory used by worker processes is not
+    traced.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(people)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark_family(people):
+    """
+    Run every applicable strategy on `people` and compare its marginals
+    with log-space variable elimination. Exact strategies must agree to
+    within `TOLERANCE`; for sampling strategies the difference is the
+    estimation error.
+    """
+    reference = variable_elimination(people, log_space=True)
+    strategies = dict()
+    for name, function, exact, limit in STRATEGIES:
+        if limit is not None and len(people) > limit:
+            continue
+        probabilities, seconds, peak = measure(function, people)
+        difference = float(max_difference(reference, probabilities))
+        strategies[name] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "exact": exact,
+            "max_difference": difference,
+            "agrees": difference <= TOLERANCE if exact else True
+        }
+    return strategies
+
+
+def run_benchmarks(sizes=SIZES, observed=OBSERVED, seed=0):
+    """
+    Benchmark every strategy on the bundled families and on synthetic
+    pedigrees of each size in `sizes`. Return a list of JSON-serialisable
+    results.
+    """
+    families = [(filename, load_data(filename)) for filename in DATA_FILES]
+    for size in sizes:
+        families.append((
+            f"synthetic {size}", random_pedigree(size, observed, seed)
+        ))
+
+    results = []
+    for name, people in families:
+        results.append({
+            "family": name,
+            "people": len(people),
+            "strategies": benchmark_family(people)
+        })
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from heredity import (DATA_FILES, GENES, PROBS, enumerate_probabilities,
+                      inheritance_probability, load_data, print_probabilities)
+
+CHUNK_SIZE = 1 << 16
+
+
+def main():
+    if len(sys.argv) == 2 and sys.argv[1] == "--benchmark":
+        benchmark()
+        return
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python compiled.py data.csv | --benchmark")
+    people = load_data(sys.argv[1])
+    probabilities = CompiledFamily(people).probabilities()
+    print_probabilities(people, probabilities)
+
+
+class CompiledFamily():
+    """
+    A family compiled for fast evaluation of `joint_probability`.
+
+    People are numbered in the order of `people`. An assignment is a
+    sequence `genes` of gene counts (0, 1 or 2) and a sequence `traits` of
+    0 or 1, both indexed by person number.
+
+    Each person is reduced to the indices of their parents and one table
+    `table[mother][father][genes][trait]`, the probability of their own
+    gene count given their parents' times the probability of their trait
+    given their gene count. For people without parents both parent indices
+    point at the person themselves and the table holds the unconditional
+    gene probability, so every person is evaluated the same way.
+    """
+
+    def __init__(self, people):
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.known = [people[name]["trait"] for name in self.names]
+
+        # Probability of each trait value (False, True) given gene count
+        self.trait_table = [
+            [PROBS["trait"][g][False], PROBS["trait"][g][True]]
+            for g in GENES
+        ]
+        # Probability of a child's gene count given the parents'
+        self.inheritance_table = [
+            [[inheritance_probability(g, m, f) for g in GENES]
+             for f in GENES]
+            for m in GENES
+        ]
+        self.founder_table = [
+            [[[PROBS["gene"][g] * self.trait_table[g][t] if m == f == g else 0
+               for t in (0, 1)]
+              for g in GENES]
+             for f in GENES]
+            for m in GENES
+        ]
+        self.child_table = [
+            [[[self.inheritance_table[m][f][g] * self.trait_table[g][t]
+               for t in (0, 1)]
+              for g in GENES]
+             for f in GENES]
+            for m in GENES
+        ]
+
+        self.people = []
+        self.batch_people = []
+        founder_array = np.asarray(self.founder_table)
+        child_array = np.asarray(self.child_table)
+        for i, name in enumerate(self.names):
+            if people[name]["mother"] is None:
+                self.people.append((i, i, i, self.founder_table))
+                self.batch_people.append((i, i, i, founder_array))
+            else:
+                mother = index[people[name]["mother"]]
+                father = index[people[name]["father"]]
+                self.people.append((i, mother, father, self.child_table))
+                self.batch_people.append((i, mother, father, child_array))
+
+    def joint(self, genes, traits):
+        """
+        Return the joint probability of the assignment `genes`, `traits`.
+        """
+        p = 1
+        for i, mother, father, table in self.people:
+            p *= table[genes[mother]][genes[father]][genes[i]][traits[i]]
+        return p
+
+    def joint_batch(self, genes, traits):
+        """
+        Return the joint probabilities of many assignments at once.
+        `genes` and `traits` are NumPy integer arrays of shape
+        (assignments, people).
+        """
+        factors = np.empty(genes.shape)
+        for i, mother, father, table in self.batch_people:
+            factors[:, i] = table[
+                genes[:, mother], genes[:, father], genes[:, i], traits[:, i]
+            ]
+        return factors.prod(axis=1)
+
+    def trait_choices(self):
+        """
+        Return, for each person, the trait values consistent with what is
+        known about them.
+        """
+        return [
+            (0, 1) if trait is None else (int(trait),)
+            for trait in self.known
+        ]
+
+    def assignments(self, prefix=()):
+        """
+        Yield every (genes, traits) assignment consistent with the known
+        traits, as tuples of integers. If given, `prefix` fixes the gene
+        counts of the first people.
+        """
+        prefix = tuple(prefix)
+        trait_choices = self.trait_choices()
+        for rest in itertools.product(GENES,
+                                      repeat=len(self.names) - len(prefix)):
+            genes = prefix + rest
+            for traits in itertools.product(*trait_choices):
+                yield genes, traits
+
+    def totals(self, prefix=()):
+        """
+        Return the unnormalised per-person totals (gene_totals,
+        trait_totals), indexed by gene count and trait value, over every
+        consistent assignment starting with the gene counts `prefix`.
+        """
+        n = len(self.names)
+        gene_totals = [[0, 0, 0] for _ in range(n)]
+        trait_totals = [[0, 0] for _ in range(n)]
+        for genes, traits in self.assignments(prefix):
+            p = self.joint(genes, traits)
+            for i in range(n):
+                gene_totals[i][genes[i]] += p
+                trait_totals[i][traits[i]] += p
+        return gene_totals, trait_totals
+
+    def probabilities(self):
+        """
+        Return the gene and trait distribution of every person, in the
+        format of the `probabilities` dictionary computed by
+        `heredity.main`, by enumerating every consistent assignment.
+        """
+        return self.to_probabilities(*self.totals())
+
+    def decode(self, start, stop):
+        """
+        Return the assignments numbered `start` to `stop` as NumPy integer
+        matrices (genes, traits) of shape (stop - start, people).
+
+        Assignment numbers enumerate the same space as `assignments`: the
+        low bits choose the traits of people whose trait is unknown and the
+        rest, read in base 3, choose everyone's gene count.
+        """
+        unknown = [i for i, trait in enumerate(self.known) if trait is None]
+        codes = np.arange(start, stop, dtype=np.int64)
+        trait_codes, gene_codes = codes % (1 << len(unknown)), codes >> len(unknown)
+
+        genes = np.empty((len(codes), len(self.names)), dtype=np.int64)
+        for i in range(len(self.names)):
+            gene_codes, genes[:, i] = np.divmod(gene_codes, 3)
+
+        traits = np.empty_like(genes)
+        for i, trait in enumerate(self.known):
+            if trait is not None:
+                traits[:, i] = int(trait)
+        for bit, i in enumerate(unknown):
+            traits[:, i] = (trait_codes >> bit) & 1
+        return genes, traits
+
+    def batch_probabilities(self, chunk_size=CHUNK_SIZE):
+        """
+        Return the same distributions as `probabilities`, evaluating
+        assignments `chunk_size` at a time with NumPy.
+
+        Each chunk is decoded into integer matrices, its joint
+        probabilities are computed with `joint_batch`, and per-person
+        totals are accumulated with weighted `np.bincount`, so memory is
+        bounded by the chunk size.
+        """
+        n = len(self.names)
+        unknown = sum(trait is None for trait in self.known)
+        total = 3 ** n << unknown
+        gene_totals = np.zeros((n, 3))
+        trait_totals = np.zeros((n, 2))
+        for start in range(0, total, chunk_size):
+            genes, traits = self.decode(start, min(start + chunk_size, total))
+            p = self.joint_batch(genes, traits)
+            for i in range(n):
+                gene_totals[i] += np.bincount(genes[:, i], p, minlength=3)
+                trait_totals[i] += np.bincount(traits[:, i], p, minlength=2)
+        return self.to_probabilities(gene_totals, trait_totals)
+
+    def to_probabilities(self, gene_totals, trait_totals):
+        """
+        Convert per-person totals indexed by gene count and trait value
+        into a normalised `probabilities` dictionary.
+        """
+        probabilities = dict()
+        for i, name in enumerate(self.names):
+            genes = sum(gene_totals[i])
+            traits = sum(trait_totals[i])
+            probabilities[name] = {
+                "gene": {g: float(gene_totals[i][g]) / genes
+                         for g in (2, 1, 0)},
+                "trait": {True: float(trait_totals[i][1]) / traits,
+                          False: float(trait_totals[i][0]) / traits}
+            }
+        return probabilities
+
+
+def benchmark():
+    """
+    Time enumeration with `heredity.joint_probability` against the compiled
+    evaluator, one assignment at a time and in NumPy batches, on the
+    bundled data files.
+    """
+    for filename in DATA_FILES:
+        people = load_data(filename)
+
+        start = time.perf_counter()
+        enumerate_probabilities(people)
+        original = time.perf_counter() - start
+
+        start = time.perf_counter()
+        family = CompiledFamily(people)
+        family.probabilities()
+        compiled = time.perf_counter() - start
+
+        line = (f"{filename}: original {original:.4f}s, "
+                f"compiled {compiled:.4f}s ({original / compiled:.1f}x)")
+
+        start = time.perf_counter()
+        family.batch_probabilities()
+        batch = time.perf_counter() - start
+        line += f", NumPy batches {batch:.4f}s ({original / batch:.1f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
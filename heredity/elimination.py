@@ -0,0 +1,296 @@
+import itertools
+import math
+import sys
+import time
+
+from heredity import (DATA_FILES, GENES, PROBS, enumerate_probabilities,
+                      inheritance_probability, load_data, log_add,
+                      max_difference, print_probabilities)
+from pedigree import random_pedigree
+
+SYNTHETIC_SIZES = [10, 25, 50, 100]
+UNDERFLOW_SIZE = 600
+CHECKED_PEOPLE = 12
+
+
+def main():
+    if len(sys.argv) == 2 and sys.argv[1] == "--benchmark":
+        benchmark()
+        return
+    if len(sys.argv) == 2 and sys.argv[1] == "--check":
+        check_log_space()
+        return
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python elimination.py data.csv "
+                 "| --benchmark | --check")
+    people = load_data(sys.argv[1])
+
+    start = time.perf_counter()
+    probabilities = variable_elimination(people)
+    elapsed = time.perf_counter() - start
+
+    print_probabilities(people, probabilities)
+    print(f"Computed in {elapsed:.4f}s")
+
+
+class Factor():
+    """
+    A non-negative function over the gene counts of some people, stored as
+    a table mapping each tuple of gene counts to a value. In log space the
+    table holds the logarithms of the values instead.
+    """
+
+    def __init__(self, variables, table, log_space=False):
+        self.variables = tuple(variables)
+        self.table = table
+        self.log_space = log_space
+
+    def multiply(self, other):
+        variables = self.variables + tuple(
+            v for v in other.variables if v not in self.variables
+        )
+        table = dict()
+        for assignment in itertools.product(GENES, repeat=len(variables)):
+            values = dict(zip(variables, assignment))
+            a = self.table[tuple(values[v] for v in self.variables)]
+            b = other.table[tuple(values[v] for v in other.variables)]
+            table[assignment] = a + b if self.log_space else a * b
+        return Factor(variables, table, self.log_space)
+
+    def sum_out(self, variable):
+        position = self.variables.index(variable)
+        variables = self.variables[:position] + self.variables[position + 1:]
+        table = dict()
+        for assignment, value in self.table.items():
+            key = assignment[:position] + assignment[position + 1:]
+            if self.log_space:
+                table[key] = log_add(table.get(key, -math.inf), value)
+            else:
+                table[key] = table.get(key, 0) + value
+        return Factor(variables, table, self.log_space)
+
+
+def log(value):
+    """
+    Return the natural logarithm of `value`, or -inf if it is zero.
+    """
+    return math.log(value) if value > 0 else -math.inf
+
+
+def person_factors(people, log_space=False):
+    """
+    Return the factors of the Bayesian network for `people`: for each
+    person, the probability of their gene count given their parents' (or
+    the unconditional probability, for people without parents), times the
+    probability of their observed trait, if known. If `log_space` is true,
+    the factors hold logarithms.
+    """
+    factors = []
+    for person, data in people.items():
+        trait = data["trait"]
+
+        def evidence(genes):
+            return 1 if trait is None else PROBS["trait"][genes][trait]
+
+        if data["mother"] is None:
+            factors.append(Factor((person,), {
+                (g,): PROBS["gene"][g] * evidence(g) for g in GENES
+            }))
+        else:
+            factors.append(Factor(
+                (person, data["mother"], data["father"]),
+                {
+                    (g, m, f): inheritance_probability(g, m, f) * evidence(g)
+                    for g, m, f in itertools.product(GENES, repeat=3)
+                }
+            ))
+    if log_space:
+        for factor in factors:
+            factor.table = {key: log(value)
+                            for key, value in factor.table.items()}
+            factor.log_space = True
+    return factors
+
+
+def elimination_order(factors, keep):
+    """
+    Return an order in which to eliminate every variable except `keep`,
+    greedily choosing the variable with the fewest neighbours in the
+    interaction graph of `factors` (the min-degree heuristic).
+    """
+    neighbours = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            neighbours.setdefault(variable, set()).update(factor.variables)
+    for variable in neighbours:
+        neighbours[variable].discard(variable)
+
+    order = []
+    remaining = set(neighbours) - {keep}
+    while remaining:
+        variable = min(remaining, key=lambda v: (len(neighbours[v]), v))
+        remaining.remove(variable)
+        order.append(variable)
+
+        # Eliminating a variable connects all of its neighbours
+        adjacent = neighbours.pop(variable)
+        for v in adjacent:
+            neighbours[v].discard(variable)
+            neighbours[v].update(adjacent - {v})
+    return order
+
+
+def gene_marginal(factors, person):
+    """
+    Return the unnormalised distribution of `person`'s gene count, summing
+    every other variable out of the product of `factors`. In log space the
+    distribution holds logarithms.
+    """
+    factors = list(factors)
+    for variable in elimination_order(factors, person):
+        involved = [f for f in factors if variable in f.variables]
+        factors = [f for f in factors if variable not in f.variables]
+        product = involved[0]
+        for factor in involved[1:]:
+            product = product.multiply(factor)
+        factors.append(product.sum_out(variable))
+
+    log_space = factors[0].log_space
+    marginal = {g: 0 if log_space else 1 for g in GENES}
+    for factor in factors:
+        for g in GENES:
+            value = factor.table[(g,) if factor.variables else ()]
+            if log_space:
+                marginal[g] += value
+            else:
+                marginal[g] *= value
+    return marginal
+
+
+def variable_elimination(people, log_space=False, names=None):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    given the known traits, in the format of the `probabilities` dictionary
+    computed by `heredity.main`.
+
+    The family is treated as a Bayesian network in which each person's
+    gene count depends on their parents' and each trait depends on its
+    owner's gene count. Each person's gene distribution is found by
+    variable elimination over the pedigree, and their trait distribution
+    follows from it.
+
+    If `log_space` is true, factors hold logarithms and are summed with
+    log-sum-exp, so large pedigrees whose evidence has a probability too
+    small for a float do not underflow to zero. If `names` is given, only
+    those people's distributions are computed.
+    """
+    factors = person_factors(people, log_space)
+    probabilities = dict()
+    for person in people if names is None else names:
+        genes = gene_marginal(factors, person)
+        if log_space:
+            largest = max(genes.values())
+            genes = {g: math.exp(genes[g] - largest) for g in GENES}
+        total = sum(genes.values())
+        genes = {g: genes[g] / total for g in (2, 1, 0)}
+
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(
+                genes[g] * PROBS["trait"][g][True] for g in GENES
+            )
+        else:
+            has_trait = 1 if trait else 0
+        probabilities[person] = {
+            "gene": genes,
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
+
+
+def valid_distributions(probabilities):
+    """
+    Return whether every distribution in a `probabilities` dictionary is
+    finite, non-negative and sums to 1.
+    """
+    return all(
+        all(math.isfinite(p) and p >= 0 for p in dist.values())
+        and math.isclose(sum(dist.values()), 1, abs_tol=1e-9)
+        for fields in probabilities.values() for dist in fields.values()
+    )
+
+
+def check_log_space(size=UNDERFLOW_SIZE, seed=0):
+    """
+    Check the log-space paths on cases where linear space fails.
+
+    In a synthetic pedigree of `size` people who all show the trait, each
+    observation has a probability of a few percent, so the probability of
+    the evidence underflows to zero and linear-space elimination divides
+    by zero. Log-space elimination must still give valid distributions
+    for an evenly spaced sample of `CHECKED_PEOPLE` people. On the bundled
+    families, log-space enumeration and elimination must agree with linear
+    space.
+    """
+    people = random_pedigree(size, 1.0, seed)
+    for data in people.values():
+        data["trait"] = True
+    names = list(people)[::max(1, len(people) // CHECKED_PEOPLE)]
+
+    try:
+        linear = variable_elimination(people, names=names[:1])
+    except ZeroDivisionError:
+        linear = None
+    if linear is not None and valid_distributions(linear):
+        raise RuntimeError(f"linear space did not underflow on {len(people)} "
+                           f"affected people")
+    start = time.perf_counter()
+    probabilities = variable_elimination(people, log_space=True, names=names)
+    elapsed = time.perf_counter() - start
+    if not valid_distributions(probabilities):
+        raise RuntimeError("log-space elimination gave invalid distributions")
+    print(f"{len(people)} affected people: linear space underflows, "
+          f"log space valid for {len(names)} people in {elapsed:.2f}s")
+
+    for filename in DATA_FILES:
+        people = load_data(filename)
+        expected = enumerate_probabilities(people)
+        difference = max(
+            max_difference(expected, enumerate_probabilities(
+                people, log_space=True)),
+            max_difference(expected, variable_elimination(
+                people, log_space=True))
+        )
+        if difference > 1e-12:
+            raise RuntimeError(f"log space disagrees on {filename}")
+        print(f"{filename}: log space agrees to {difference:.1e}")
+
+
+def benchmark():
+    """
+    Time variable elimination against enumeration on the bundled families,
+    and variable elimination alone on larger synthetic pedigrees.
+    """
+    for filename in DATA_FILES:
+        people = load_data(filename)
+        start = time.perf_counter()
+        expected = enumerate_probabilities(people)
+        enumeration = time.perf_counter() - start
+        start = time.perf_counter()
+        probabilities = variable_elimination(people)
+        elimination = time.perf_counter() - start
+        print(f"{filename}: enumeration {enumeration:.4f}s, "
+              f"elimination {elimination:.4f}s, "
+              f"max difference {max_difference(expected, probabilities):.1e}")
+
+    for size in SYNTHETIC_SIZES:
+        people = random_pedigree(size)
+        start = time.perf_counter()
+        variable_elimination(people)
+        elimination = time.perf_counter() - start
+        print(f"synthetic pedigree of {len(people)}: "
+              f"elimination {elimination:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import csv
 import itertools
+import math
 import sys
 
+GENES = (0, 1, 2)
+DATA_FILES = ["data/family0.csv", "data/family1.csv", "data/family2.csv"]
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -45,6 +49,49 @@ def main():
     people = load_data(sys.argv[1])
     print(people)
 
+    probabilities = enumerate_probabilities(people)
+
+    # Print results
+    print_probabilities(people, probabilities)
+
+
+def print_probabilities(people, probabilities):
+    """
+    Print the gene and trait distribution of every person in `people`
+    from a `probabilities` dictionary.
+    """
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def max_difference(a, b):
+    """
+    Return the largest absolute difference between two `probabilities`
+    dictionaries.
+    """
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in a for field in a[person] for value in a[person][field]
+    )
+
+
+def enumerate_probabilities(people, pruned=True, log_space=False):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    by enumerating every assignment of genes and traits consistent with
+    the known traits.
+
+    If `pruned` is true, assignments come from `consistent_assignments`;
+    otherwise every subset of people is generated with `powerset` and
+    those that contradict the known traits are skipped. If `log_space` is
+    true, joint probabilities and their sums are kept as logarithms, so
+    large families do not underflow to zero.
+    """
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {
@@ -60,8 +107,36 @@ def main():
         }
         for person in people
     }
-    # print(probabilities)
 
+    assignments = (consistent_assignments(people) if pruned
+                   else powerset_assignments(people))
+    if log_space:
+        for dists in probabilities.values():
+            for dist in dists.values():
+                for key in dist:
+                    dist[key] = -math.inf
+        for one_gene, two_genes, have_trait in assignments:
+            log_p = log_joint_probability(people, one_gene, two_genes, have_trait)
+            log_update(probabilities, one_gene, two_genes, have_trait, log_p)
+        return log_normalize(probabilities)
+
+    for one_gene, two_genes, have_trait in assignments:
+
+        # Update probabilities with new joint probability
+        p = joint_probability(people, one_gene, two_genes, have_trait)
+        update(probabilities, one_gene, two_genes, have_trait, p)
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+
+    return probabilities
+
+
+def powerset_assignments(people):
+    """
+    Yield every (one_gene, two_genes, have_trait) triple of sets that does
+    not contradict the known traits of `people`, by filtering powersets.
+    """
     # Loop over all sets of people who might have the trait
     names = set(people)
     for have_trait in powerset(names):
@@ -78,25 +153,49 @@ def main():
         # Loop over all sets of people who might have the gene
         for one_gene in powerset(names):
             for two_genes in powerset(names - one_gene):
+                yield one_gene, two_genes, have_trait
 
-                # Update probabilities with new joint probability
-                # print(f"Calculating JP: 1G= {one_gene}, 2G= {two_genes} T= {have_trait}")
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
-                # print(f"New Probs = {probabilities}")
-    print(probabilities)
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+def consistent_assignments(people):
+    """
+    Yield every (one_gene, two_genes, have_trait) triple of sets that does
+    not contradict the known traits of `people`.
+
+    Gene counts are stepped through like an odometer of 0, 1 or 2 per
+    person, moving only the people whose count changes between the sets,
+    and traits are only varied for people whose trait is unknown, so no
+    assignment is generated only to be discarded. The yielded sets are
+    reused from one assignment to the next, so copy them to keep them.
+    """
+    names = list(people)
+    known = {person for person in names if people[person]["trait"]}
+    unknown = [person for person in names if people[person]["trait"] is None]
+    trait_sets = [
+        known.union(itertools.compress(unknown, traits))
+        for traits in itertools.product((False, True), repeat=len(unknown))
+    ]
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    genes = [0] * len(names)
+    one_gene = set()
+    two_genes = set()
+    while True:
+        for have_trait in trait_sets:
+            yield one_gene, two_genes, have_trait
+
+        # Reset the trailing people with two genes and carry to the next
+        i = len(names) - 1
+        while i >= 0 and genes[i] == 2:
+            genes[i] = 0
+            two_genes.remove(names[i])
+            i -= 1
+        if i < 0:
+            return
+        if genes[i] == 0:
+            one_gene.add(names[i])
+        else:
+            one_gene.remove(names[i])
+            two_genes.add(names[i])
+        genes[i] += 1
 
 
 def load_data(filename):
@@ -156,71 +255,104 @@ def find_gene_number(person, one_gene, two_genes):
         return 0
     
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def pass_probability(genes):
     """
-    Compute and return a joint probability.
-
-    The probability returned should be the probability that
-        * everyone in set `one_gene` has one copy of the gene, and
-        * everyone in set `two_genes` has two copies of the gene, and
-        * everyone not in `one_gene` or `two_gene` does not have the gene, and
-        * everyone in set `have_trait` has the trait, and
-        * everyone not in set` have_trait` does not have the trait.
+    Return the probability that a parent with `genes` copies of the gene
+    passes one on to a child.
     """
-    #Create dictionaries of inheritence probabilities
-    inheritenceProbs = {
-        0 : 0 + PROBS['mutation'],
-        1 : 0.5, #Plus and minus mutation
-        2: 1 - PROBS['mutation']
-    }
+    if genes == 0:
+        return PROBS["mutation"]
+    elif genes == 1:
+        return 0.5
+    return 1 - PROBS["mutation"]
 
-    #Initialise output dictionary
-    jointProbs = dict()
 
-    #Loop through people
-    for person in people:
+def inheritance_probability(child, mother, father):
+    """
+    Return the probability that a child of parents with `mother` and
+    `father` copies of the gene has `child` copies.
+    """
+    m = pass_probability(mother)
+    f = pass_probability(father)
+    if child == 2:
+        return m * f
+    elif child == 1:
+        return m * (1 - f) + f * (1 - m)
+    return (1 - m) * (1 - f)
 
-        #If the person is parentless, we can fetch unconditional probabilities
-        if people[person]['mother'] == None:
-            
-            #If person in one_gene, fetch probability of one gene * trait status
-            if person in one_gene:
-                jointProbs[person] = PROBS['gene'][1]*PROBS['trait'][1][person in have_trait]
 
-            #If person in one_gene, fetch probability of one gene * trait status
-            elif person in two_genes:
-                jointProbs[person] = PROBS['gene'][2]*PROBS['trait'][2][person in have_trait]
+def person_probability(people, person, one_gene, two_genes, have_trait):
+    """
+    Return the probability of `person`'s gene count and trait, given the
+    gene counts of their parents (or unconditionally, if they have none).
+    """
+    #If the person is parentless, we can fetch unconditional probabilities
+    if people[person]['mother'] == None:
+
+        #If person in one_gene, fetch probability of one gene * trait status
+        if person in one_gene:
+            return PROBS['gene'][1]*PROBS['trait'][1][person in have_trait]
 
-            #If person in neither, fetch probability of no genes * trait status
-            else:
-                jointProbs[person] = PROBS['gene'][0]*PROBS['trait'][0][person in have_trait]
+        #If person in two_genes, fetch probability of two genes * trait status
+        elif person in two_genes:
+            return PROBS['gene'][2]*PROBS['trait'][2][person in have_trait]
 
-        #If the person has parents, we use probabilities of inheritence.
+        #If person in neither, fetch probability of no genes * trait status
         else:
+            return PROBS['gene'][0]*PROBS['trait'][0][person in have_trait]
 
-            #Find probabilities that mother and father pass on gene
-            motherPass = inheritenceProbs[find_gene_number(people[person]['mother'],one_gene,two_genes)]
-            fatherPass = inheritenceProbs[find_gene_number(people[person]['father'],one_gene,two_genes)]
+    #If the person has parents, we use probabilities of inheritence.
+    #Find probabilities that mother and father pass on gene
+    motherPass = pass_probability(find_gene_number(people[person]['mother'],one_gene,two_genes))
+    fatherPass = pass_probability(find_gene_number(people[person]['father'],one_gene,two_genes))
 
-            #If person in one_gene, calculate XOR percentage
-            if person in one_gene:
-                jointProbs[person] = ((motherPass*(1-fatherPass))+(fatherPass*(1-motherPass)))*PROBS['trait'][1][person in have_trait]
+    #If person in one_gene, calculate XOR percentage
+    if person in one_gene:
+        return ((motherPass*(1-fatherPass))+(fatherPass*(1-motherPass)))*PROBS['trait'][1][person in have_trait]
+
+    #If person in two_gene, calculate AND percentage
+    elif person in two_genes:
+        return (motherPass*fatherPass)*PROBS['trait'][2][person in have_trait]
+
+    #If person in neither, calculate AND percentage for not passing
+    else:
+        return ((1-motherPass)*(1-fatherPass))*PROBS['trait'][0][person in have_trait]
 
-            #If person in two_gene, calculate AND percentage
-            elif person in two_genes:
-                jointProbs[person] = (motherPass*fatherPass)*PROBS['trait'][2][person in have_trait]
 
-            #If person in neither, calculate AND percentage for not passing
-            else:
-                jointProbs[person] = ((1-motherPass)*(1-fatherPass))*PROBS['trait'][2][person in have_trait]
+def joint_probability(people, one_gene, two_genes, have_trait):
+    """
+    Compute and return a joint probability.
 
-    #Sum probabilities
+    The probability returned should be the probability that
+        * everyone in set `one_gene` has one copy of the gene, and
+        * everyone in set `two_genes` has two copies of the gene, and
+        * everyone not in `one_gene` or `two_gene` does not have the gene, and
+        * everyone in set `have_trait` has the trait, and
+        * everyone not in set` have_trait` does not have the trait.
+    """
+    #Multiply each person's probability into a running product
     product = 1
-    for value in jointProbs.values():
-        product *= value
+    for person in people:
+        product *= person_probability(people, person, one_gene, two_genes, have_trait)
 
     return product
 
+
+def log_joint_probability(people, one_gene, two_genes, have_trait):
+    """
+    Return the natural logarithm of `joint_probability`, computed as a sum
+    of logarithms so that it does not underflow for large families.
+    Return -inf if the joint probability is zero.
+    """
+    total = 0
+    for person in people:
+        p = person_probability(people, person, one_gene, two_genes, have_trait)
+        if p == 0:
+            return -math.inf
+        total += math.log(p)
+
+    return total
+
 # print(joint_probability(people,one_gene,two_genes,has_trait))
 
 
@@ -262,5 +394,53 @@ def normalize(probabilities):
         #Find sum of probabilities
 
 
+
+def log_add(a, b):
+    """
+    Return log(exp(a) + exp(b)) without overflow or underflow.
+    """
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def log_update(log_probabilities, one_gene, two_genes, have_trait, log_p):
+    """
+    Add a new joint probability, given as its logarithm `log_p`, to
+    `log_probabilities`, a dictionary shaped like `probabilities` whose
+    values are logarithms, by log-sum-exp accumulation.
+    """
+    for person, dists in log_probabilities.items():
+        genes = find_gene_number(person, one_gene, two_genes)
+        dists['gene'][genes] = log_add(dists['gene'][genes], log_p)
+        trait = person in have_trait
+        dists['trait'][trait] = log_add(dists['trait'][trait], log_p)
+
+
+def log_normalize(log_probabilities):
+    """
+    Convert `log_probabilities`, whose values are unnormalised logarithms,
+    into a normalised `probabilities` dictionary. Each distribution is
+    shifted by its largest value before exponentiating, so it stays
+    accurate however small the joint probabilities were.
+    """
+    probabilities = dict()
+    for person, dists in log_probabilities.items():
+        probabilities[person] = dict()
+        for field, dist in dists.items():
+            largest = max(dist.values())
+            if largest == -math.inf:
+                raise ValueError(f"{person} has no possible {field}")
+            weights = {key: math.exp(value - largest)
+                       for key, value in dist.items()}
+            total = sum(weights.values())
+            probabilities[person][field] = {
+                key: weight / total for key, weight in weights.items()
+            }
+    return probabilities
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+import itertools
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from compiled import CompiledFamily
+from heredity import GENES, load_data, normalize, print_probabilities
+from pedigree import random_pedigree
+
+SHARD_PEOPLE = 3
+BENCHMARK_SIZES = [6, 8]
+
+# Compiled family shared by every shard in a worker
+family = None
+
+
+def main():
+    if len(sys.argv) == 2 and sys.argv[1] == "--benchmark":
+        benchmark()
+        return
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python parallel.py data.csv [processes] | --benchmark")
+    people = load_data(sys.argv[1])
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    probabilities = parallel_probabilities(people, processes)
+    print_probabilities(people, probabilities)
+
+
+def initialize(people):
+    """
+    Compile `people` once in a worker process, so shards only send
+    prefixes.
+    """
+    global family
+    family = CompiledFamily(people)
+
+
+def shard_probabilities(prefix):
+    """
+    Return the unnormalised `probabilities` dictionary accumulated over
+    every assignment in which the first people have gene counts `prefix`.
+    """
+    gene_totals, trait_totals = family.totals(prefix)
+    return {
+        name: {
+            "gene": {g: gene_totals[i][g] for g in (2, 1, 0)},
+            "trait": {True: trait_totals[i][1], False: trait_totals[i][0]}
+        }
+        for i, name in enumerate(family.names)
+    }
+
+
+def parallel_probabilities(people, processes=None, shard_people=SHARD_PEOPLE):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    enumerating assignments across a pool of `processes` processes.
+
+    The assignment space is split into 3^k shards by the gene counts of
+    the first k = `shard_people` people. Each worker compiles the family
+    once, accumulates a local `probabilities` dictionary for each of its
+    shards, and the shards are summed and normalised.
+    """
+    k = min(shard_people, len(people))
+    prefixes = itertools.product(GENES, repeat=k)
+    with Pool(processes, initialize, (people,)) as pool:
+        shards = pool.map(shard_probabilities, prefixes)
+
+    probabilities = shards[0]
+    for shard in shards[1:]:
+        for person, fields in shard.items():
+            for field, values in fields.items():
+                for value, p in values.items():
+                    probabilities[person][field][value] += p
+    normalize(probabilities)
+    return probabilities
+
+
+def benchmark():
+    """
+    Report the time taken with 1 to N processes, N being the number of
+    CPUs, on family2 and larger synthetic families.
+    """
+    families = [("data/family2.csv", load_data("data/family2.csv"))]
+    for size in BENCHMARK_SIZES:
+        people = random_pedigree(size)
+        families.append((f"synthetic family of {len(people)}", people))
+
+    cpus = os.cpu_count() or 1
+    for name, people in families:
+        print(f"{name}:")
+        baseline = None
+        for processes in range(1, cpus + 1):
+            start = time.perf_counter()
+            parallel_probabilities(people, processes)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  {processes} processes: {elapsed:.3f}s "
+                  f"({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import csv
+import math
+import random
+import sys
+
+from heredity import GENES, PROBS, inheritance_probability
+
+MARRIAGE_PROBABILITY = 0.6
+
+
+def main():
+    if len(sys.argv) not in [3, 4, 5, 6]:
+        sys.exit("Usage: python pedigree.py output.csv size "
+                 "[depth] [observed] [seed]")
+    size = int(sys.argv[2])
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    observed = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+    people = random_pedigree(size, observed, seed, depth)
+    write_data(people, sys.argv[1])
+    print(f"Wrote {len(people)} people to {sys.argv[1]}")
+
+
+def random_pedigree(size, observed=0.5, seed=0, depth=None):
+    """
+    Return a random family of about `size` people over `depth` generations,
+    in the format returned by `load_data`.
+
+    The family starts from one founding couple. Each later generation
+    consists of children of couples from the generation before, where each
+    couple pairs a member of the family with a spouse who marries in (a
+    new person with no parents), as in a family tree. `depth` defaults to
+    roughly the square root of `size`.
+
+    Gene counts and traits are sampled from the model in `PROBS`, so the
+    evidence is realistic, and each person's trait is then kept with
+    probability `observed` and hidden otherwise.
+    """
+    rng = random.Random(seed)
+    if depth is None:
+        depth = max(2, round(math.sqrt(size)))
+    people = dict()
+    genes = dict()
+
+    def add(mother=None, father=None):
+        name = f"Person{len(people)}"
+        if mother is None:
+            weights = [PROBS["gene"][g] for g in GENES]
+        else:
+            weights = [
+                inheritance_probability(g, genes[mother], genes[father])
+                for g in GENES
+            ]
+        genes[name] = rng.choices(GENES, weights)[0]
+        trait = None
+        if rng.random() < observed:
+            trait = rng.random() < PROBS["trait"][genes[name]][True]
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": trait
+        }
+        return name
+
+    couples = [(add(), add())]
+    for level in range(1, depth):
+
+        # Spread the people still to add evenly over the remaining
+        # generations, allowing for the spouses who will marry in
+        remaining = size - len(people)
+        later = depth - level - 1
+        target = max(1, round(remaining / (1 + later * (1 + MARRIAGE_PROBABILITY))))
+        children = [add(*rng.choice(couples)) for _ in range(target)]
+        if level == depth - 1:
+            break
+
+        couples = []
+        for child in children:
+            if rng.random() < MARRIAGE_PROBABILITY or not couples:
+                couples.append(tuple(rng.sample([child, add()], 2)))
+    return people
+
+
+def write_data(people, filename):
+    """
+    Write `people` to `filename` as a CSV file that `load_data` can read.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "mother", "father", "trait"])
+        for person, data in people.items():
+            trait = "" if data["trait"] is None else int(data["trait"])
+            writer.writerow([
+                person, data["mother"] or "", data["father"] or "", trait
+            ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import math
+import random
+import sys
+
+from heredity import (GENES, PROBS, inheritance_probability, load_data,
+                      print_probabilities)
+
+SAMPLES = 10000
+BURN_IN = 1000
+CHAINS = 4
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python sampling.py data.csv [samples] [seed]")
+    people = load_data(sys.argv[1])
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else SAMPLES
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    for method in [likelihood_weighting, gibbs_sampling]:
+        probabilities, diagnostics = method(people, samples, seed=seed)
+        print(f"Results from {method.__name__} (n = {samples})")
+        print_probabilities(people, probabilities)
+        for name, value in diagnostics.items():
+            if not isinstance(value, dict):
+                print(f"{name}: {value:.4f}")
+
+
+def topological_order(people):
+    """
+    Return the names in `people` ordered so that parents come before
+    their children.
+    """
+    order = []
+    placed = set()
+    for person in people:
+
+        # Depth-first with an explicit stack, so deep pedigrees do not hit
+        # the recursion limit; a person is added once both parents are
+        stack = [(person, False)]
+        while stack:
+            person, expanded = stack.pop()
+            if expanded:
+                order.append(person)
+                continue
+            if person in placed:
+                continue
+            placed.add(person)
+            stack.append((person, True))
+            for parent in ["father", "mother"]:
+                if people[person][parent] is not None:
+                    stack.append((people[person][parent], False))
+    return order
+
+
+def evidence(people, person, genes):
+    """
+    Return the probability of `person`'s known trait given `genes` copies
+    of the gene, or 1 if their trait is unknown.
+    """
+    trait = people[person]["trait"]
+    return 1 if trait is None else PROBS["trait"][genes][trait]
+
+
+def gene_prior(people, person, model):
+    """
+    Return the distribution of `person`'s gene count given their parents'
+    gene counts in `model`, as a list indexed by gene count.
+    """
+    mother, father = people[person]["mother"], people[person]["father"]
+    if mother is None:
+        return [PROBS["gene"][g] for g in GENES]
+    return [
+        inheritance_probability(g, model[mother], model[father])
+        for g in GENES
+    ]
+
+
+def estimates(people, gene_weights):
+    """
+    Convert per-person gene count weights into a normalised `probabilities`
+    dictionary. Unknown traits are estimated from the gene distribution,
+    and known traits are certain.
+    """
+    probabilities = dict()
+    for person in people:
+        total = sum(gene_weights[person])
+        genes = {g: gene_weights[person][g] / total for g in (2, 1, 0)}
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(genes[g] * PROBS["trait"][g][True] for g in GENES)
+        else:
+            has_trait = 1 if trait else 0
+        probabilities[person] = {
+            "gene": genes,
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
+
+
+def likelihood_weighting(people, samples=SAMPLES, seed=None):
+    """
+    Estimate the gene and trait distribution of every person in `people`
+    by likelihood weighting.
+
+    Each sample draws everyone's gene count from their parents', in
+    topological order, and is weighted by the probability of the known
+    traits. Return the estimated `probabilities` dictionary and a
+    dictionary of diagnostics, including the effective sample size
+    (sum of weights squared over sum of squared weights).
+
+    Weights of large pedigrees are far too small for a float, so each
+    sample's weight is kept as a logarithm, and the sums are kept relative
+    to the largest weight seen so far, rescaling them when it grows.
+    """
+    rng = random.Random(seed)
+    order = topological_order(people)
+    gene_weights = {person: [0, 0, 0] for person in people}
+    total = total_squared = 0
+    largest = -math.inf
+
+    for _ in range(samples):
+        model = dict()
+        log_weight = 0
+        for person in order:
+            genes = rng.choices(GENES, gene_prior(people, person, model))[0]
+            model[person] = genes
+            p = evidence(people, person, genes)
+            log_weight += math.log(p) if p > 0 else -math.inf
+        if log_weight == -math.inf:
+            continue
+        if log_weight > largest:
+            scale = math.exp(largest - log_weight)
+            for weights in gene_weights.values():
+                for g in GENES:
+                    weights[g] *= scale
+            total *= scale
+            total_squared *= scale ** 2
+            largest = log_weight
+
+        weight = math.exp(log_weight - largest)
+        for person, genes in model.items():
+            gene_weights[person][genes] += weight
+        total += weight
+        total_squared += weight ** 2
+
+    if total == 0:
+        raise ValueError("every sample has zero weight")
+    return estimates(people, gene_weights), {
+        "effective_sample_size": total ** 2 / total_squared
+    }
+
+
+def gibbs_chain(people, samples, burn_in, rng):
+    """
+    Run one Gibbs sampling chain over gene counts and return, for each
+    person, the list of their sampled gene counts after `burn_in` sweeps.
+    """
+    order = topological_order(people)
+    children = {person: [] for person in people}
+    for person in people:
+        if people[person]["mother"] is not None:
+            children[people[person]["mother"]].append(person)
+            children[people[person]["father"]].append(person)
+
+    # Start from a sample of the prior, ignoring evidence
+    model = dict()
+    for person in order:
+        model[person] = rng.choices(GENES, gene_prior(people, person, model))[0]
+
+    chain = {person: [] for person in people}
+    for sweep in range(burn_in + samples):
+        for person in order:
+
+            # Resample from the distribution given the Markov blanket:
+            # parents, own trait, children and their other parents
+            weights = gene_prior(people, person, model)
+            for g in GENES:
+                weights[g] *= evidence(people, person, g)
+                model[person] = g
+                for child in children[person]:
+                    weights[g] *= inheritance_probability(
+                        model[child],
+                        model[people[child]["mother"]],
+                        model[people[child]["father"]]
+                    )
+            model[person] = rng.choices(GENES, weights)[0]
+
+        if sweep >= burn_in:
+            for person in people:
+                chain[person].append(model[person])
+    return chain
+
+
+def potential_scale_reduction(chains):
+    """
+    Return the Gelman-Rubin potential scale reduction factor (R-hat) of
+    a list of equally long chains of numbers. Values close to 1 suggest
+    the chains have converged.
+    """
+    m, n = len(chains), len(chains[0])
+    means = [sum(chain) / n for chain in chains]
+    mean = sum(means) / m
+    between = n / (m - 1) * sum((x - mean) ** 2 for x in means)
+    within = sum(
+        sum((x - means[i]) ** 2 for x in chain) / (n - 1)
+        for i, chain in enumerate(chains)
+    ) / m
+    if within == 0:
+        return 1.0
+    return (((n - 1) / n * within + between / n) / within) ** 0.5
+
+
+def gibbs_sampling(people, samples=SAMPLES, burn_in=BURN_IN, chains=CHAINS,
+                   seed=None):
+    """
+    Estimate the gene and trait distribution of every person in `people`
+    by Gibbs sampling over gene counts given the known traits.
+
+    `chains` independent chains each discard `burn_in` sweeps and then
+    keep `samples` // `chains` sweeps. Return the estimated `probabilities`
+    dictionary and a dictionary of diagnostics, including each person's
+    Gelman-Rubin R-hat for their gene count and the largest of these.
+    """
+    rng = random.Random(seed)
+    length = max(2, samples // chains)
+    runs = [gibbs_chain(people, length, burn_in, rng) for _ in range(chains)]
+
+    gene_weights = {person: [0, 0, 0] for person in people}
+    for run in runs:
+        for person, values in run.items():
+            for genes in values:
+                gene_weights[person][genes] += 1
+
+    r_hat = dict()
+    if chains > 1:
+        for person in people:
+            r_hat[person] = potential_scale_reduction(
+                [run[person] for run in runs]
+            )
+    return estimates(people, gene_weights), {
+        "r_hat": r_hat,
+        "max_r_hat": max(r_hat.values(), default=1.0)
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+import sys
+import time
+
+import bitparallel
+import compiler
+import graycode
+import logic
+import parallel
+import resolution
+import sat
+from generator import random_puzzle
+from knowledge import KnowledgeBase
+from simplify import simplify
+
+SIZES = [2, 3, 4, 5, 6, 8, 10, 16, 32]
+TREE_LIMIT = 6
+ENUMERATION_LIMIT = 8
+TABLE_LIMIT = 10
+RESOLUTION_LIMIT = 32
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py output.json [characters ...]")
+    sizes = [int(size) for size in sys.argv[2:]] or SIZES
+    results = run_benchmarks(sizes)
+    with open(sys.argv[1], "w") as f:
+        json.dump(results, f, indent=2)
+    for result in results:
+        print(f"{result['characters']} characters "
+              f"({result['symbols']} symbols):")
+        for name, measurement in result["engines"].items():
+            check = "ok" if measurement["agrees"] else "MISMATCH"
+            print(f"  {name}: {measurement['seconds']:.4f}s ({check})")
+
+
+def each_query(model_check):
+    """Returns an engine that calls `model_check` once per query."""
+    def engine(knowledge, queries):
+        return [model_check(knowledge, query) for query in queries]
+    return engine
+
+
+def knowledge_base(knowledge, queries):
+    base = KnowledgeBase(knowledge)
+    return [base.entails(query) for query in queries]
+
+
+def simplified(knowledge, queries):
+    return each_query(logic.model_check)(simplify(knowledge), queries)
+
+
+# Each engine with the largest number of characters it is run on. graycode
+# is slower than model_check below 6 characters, where its circuit setup
+# outweighs the enumeration it saves, and only pulls ahead from there.
+ENGINES = [
+    ("model_check", each_query(logic.model_check), TREE_LIMIT),
+    ("model_check (simplified)", simplified, TREE_LIMIT),
+    ("graycode", each_query(graycode.model_check), ENUMERATION_LIMIT),
+    ("compiler", each_query(compiler.model_check), ENUMERATION_LIMIT),
+    ("parallel", each_query(parallel.parallel_model_check), TREE_LIMIT),
+    ("bitparallel", each_query(bitparallel.model_check), TABLE_LIMIT),
+    ("resolution", each_query(resolution.model_check), RESOLUTION_LIMIT),
+    ("knowledge base", knowledge_base, None),
+    ("sat", each_query(sat.model_check), None)
+]
+
+
+def benchmark_puzzle(puzzle):
+    """
+    Run every applicable engine on `puzzle`, asking whether each character
+    is a knight and whether they are a knave, and compare the answers with
+    the SAT solver.
+    """
+    knowledge = puzzle.knowledge()
+    queries = puzzle.queries()
+    reference = each_query(sat.model_check)(knowledge, queries)
+    engines = dict()
+    for name, engine, limit in ENGINES:
+        if limit is not None and len(puzzle.characters) > limit:
+            continue
+        start = time.perf_counter()
+        answers = engine(knowledge, queries)
+        engines[name] = {
+            "seconds": time.perf_counter() - start,
+            "agrees": answers == reference
+        }
+    return engines
+
+
+def run_benchmarks(sizes=SIZES, seed=0):
+    """
+    Benchmark every engine on a random solvable puzzle with each number
+    of characters in `sizes`. Return a list of JSON-serialisable results.
+    """
+    results = []
+    for n in sizes:
+        puzzle = random_puzzle(n, seed=seed)
+        results.append({
+            "characters": n,
+            "symbols": len(puzzle.knowledge().symbols()),
+            "engines": benchmark_puzzle(puzzle)
+        })
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import itertools
+import time
+
+from logic import (And, Biconditional, Implication, Not, Or, Sentence, Symbol,
+                   model_check as tree_model_check)
+
+BLOCK_SYMBOLS = 16
+BENCHMARK_SIZES = [8, 12, 16, 20, 24]
+TREE_LIMIT = 16
+
+
+def column(position, width):
+    """
+    Returns the truth table of the symbol at `position` over 2^`width`
+    models, as an integer whose bit m is set if bit `position` of m is.
+    """
+    run = 1 << position
+    pattern = ((1 << run) - 1) << run
+    size = 2 * run
+    while size < 1 << width:
+        pattern |= pattern << size
+        size *= 2
+    return pattern
+
+
+def evaluate(sentence, columns, full, cache):
+    """
+    Returns the truth table of `sentence` as an integer, given the truth
+    table of each symbol in `columns` and the all-true table `full`.
+    Tables of subsentences are memoised in `cache` by identity, so shared
+    subsentences are only evaluated once.
+    """
+    key = id(sentence)
+    if key in cache:
+        return cache[key]
+
+    if isinstance(sentence, Symbol):
+        table = columns[sentence.name]
+    elif isinstance(sentence, Not):
+        table = full ^ evaluate(sentence.operand, columns, full, cache)
+    elif isinstance(sentence, And):
+        table = full
+        for conjunct in sentence.conjuncts:
+            table &= evaluate(conjunct, columns, full, cache)
+    elif isinstance(sentence, Or):
+        table = 0
+        for disjunct in sentence.disjuncts:
+            table |= evaluate(disjunct, columns, full, cache)
+    elif isinstance(sentence, Implication):
+        table = ((full ^ evaluate(sentence.antecedent, columns, full, cache))
+                 | evaluate(sentence.consequent, columns, full, cache))
+    elif isinstance(sentence, Biconditional):
+        table = full ^ (evaluate(sentence.left, columns, full, cache)
+                        ^ evaluate(sentence.right, columns, full, cache))
+    else:
+        raise TypeError(f"cannot evaluate {type(sentence).__name__}")
+
+    cache[key] = table
+    return table
+
+
+def truth_tables(sentences, symbols, block_symbols=BLOCK_SYMBOLS):
+    """
+    Yields, for each block of models, a list of the truth tables of
+    `sentences` over that block, as integers.
+
+    The models of `symbols` are split into blocks of 2^`block_symbols`:
+    the first `block_symbols` symbols vary within a block, as bit columns,
+    and the rest are fixed for the whole block to all-true or all-false.
+    """
+    for sentence in sentences:
+        Sentence.validate(sentence)
+    symbols = list(symbols)
+    low, high = symbols[:block_symbols], symbols[block_symbols:]
+    full = (1 << (1 << len(low))) - 1
+    columns = {
+        name: column(position, len(low)) for position, name in enumerate(low)
+    }
+    for values in itertools.product((full, 0), repeat=len(high)):
+        columns.update(zip(high, values))
+        cache = dict()
+        yield [evaluate(sentence, columns, full, cache)
+               for sentence in sentences]
+
+
+def model_check(knowledge, query, block_symbols=BLOCK_SYMBOLS):
+    """
+    Checks if knowledge base entails query, by evaluating both over blocks
+    of 2^`block_symbols` models at once with bitwise operations and
+    checking that no model satisfies knowledge but not query.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    for kb, q in truth_tables([knowledge, query], symbols, block_symbols):
+        if kb & ~q:
+            return False
+    return True
+
+
+def benchmark_knowledge(size):
+    """
+    Returns a knowledge base and query over `size` symbols: a chain of
+    implications from the first symbol to the last, which every model
+    has to be checked against.
+    """
+    chain = [Symbol(f"P{i:02}") for i in range(size)]
+    knowledge = And(*[Implication(chain[i], chain[i + 1])
+                      for i in range(size - 1)])
+    return knowledge, Implication(chain[0], chain[-1])
+
+
+def main():
+    for size in BENCHMARK_SIZES:
+        knowledge, query = benchmark_knowledge(size)
+
+        start = time.perf_counter()
+        result = model_check(knowledge, query)
+        bitwise = time.perf_counter() - start
+        line = f"{size} symbols: bit-parallel {bitwise:.4f}s"
+
+        if size <= TREE_LIMIT:
+            start = time.perf_counter()
+            if tree_model_check(knowledge, query) != result:
+                raise RuntimeError("model checkers disagree")
+            tree = time.perf_counter() - start
+            line += f", check_all {tree:.4f}s ({tree / bitwise:.0f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import itertools
+import time
+from functools import lru_cache
+
+import puzzle
+from logic import (And, Biconditional, Implication, Not, Or, Sentence, Symbol,
+                   model_check as tree_model_check)
+
+
+NESTING_LIMIT = 50
+
+
+def expression(sentence, index, lines, hoisted):
+    """
+    Returns Python source for an expression evaluating `sentence` over a
+    model `m`, a sequence of truth values where symbol `name` is at
+    position `index[name]`, and how deeply its brackets nest.
+
+    Python's parser rejects expressions nested about 200 brackets deep,
+    so a subsentence nesting more than `NESTING_LIMIT` deep is instead
+    assigned to a temporary variable by a statement appended to `lines`,
+    and the variable is used in its place. `hoisted` maps each such
+    subsentence to its variable, so equal subsentences share one.
+    """
+    if sentence in hoisted:
+        return hoisted[sentence], 0
+    if isinstance(sentence, Symbol):
+        return f"m[{index[sentence.name]}]", 1
+    if isinstance(sentence, Not):
+        operand, depth = expression(sentence.operand, index, lines, hoisted)
+        source, depth = f"(not {operand})", depth + 1
+    elif isinstance(sentence, (And, Or)):
+        if isinstance(sentence, And):
+            parts, operator, empty = sentence.conjuncts, " and ", "True"
+        else:
+            parts, operator, empty = sentence.disjuncts, " or ", "False"
+        if not parts:
+            return empty, 0
+        parts = [expression(part, index, lines, hoisted) for part in parts]
+        source = "(" + operator.join(part for part, _ in parts) + ")"
+        depth = max(depth for _, depth in parts) + 1
+    elif isinstance(sentence, Implication):
+        antecedent, left = expression(sentence.antecedent, index, lines,
+                                      hoisted)
+        consequent, right = expression(sentence.consequent, index, lines,
+                                       hoisted)
+        source = f"((not {antecedent}) or {consequent})"
+        depth = max(left + 1, right) + 1
+    elif isinstance(sentence, Biconditional):
+        left, left_depth = expression(sentence.left, index, lines, hoisted)
+        right, right_depth = expression(sentence.right, index, lines,
+                                        hoisted)
+        source = f"({left} == {right})"
+        depth = max(left_depth, right_depth) + 1
+    else:
+        raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+    if depth > NESTING_LIMIT:
+        variable = f"t{len(hoisted)}"
+        lines.append(f"    {variable} = {source}")
+        hoisted[sentence] = variable
+        return variable, 0
+    return source, depth
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Compiles `sentence` into a Python function of one argument, a sequence
+    of truth values ordered like `symbols`, that returns whether the
+    sentence is true in that model. Each subsentence is evaluated at most
+    once per call, with no dictionary lookups or method calls.
+    """
+    Sentence.validate(sentence)
+    index = {name: i for i, name in enumerate(symbols)}
+    lines = ["def compiled(m):"]
+    source, _ = expression(sentence, index, lines, dict())
+    lines.append(f"    return bool({source})")
+    namespace = dict()
+    exec("\n".join(lines), namespace)
+    return namespace["compiled"]
+
+
+@lru_cache(maxsize=256)
+def cached_compile(sentence, symbols):
+    """
+    Returns `compile_sentence(sentence, symbols)`, reusing the function
+    compiled for an equal sentence over the same tuple of symbols.
+    """
+    return compile_sentence(sentence, symbols)
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by evaluating compiled
+    versions of both over every model. Compiled functions are cached, so
+    checking many queries against one knowledge base compiles it once.
+    """
+    symbols = tuple(sorted(set.union(knowledge.symbols(), query.symbols())))
+    knowledge = cached_compile(knowledge, symbols)
+    query = cached_compile(query, symbols)
+
+    # Query must be true in every model in which knowledge is true
+    models = itertools.product((True, False), repeat=len(symbols))
+    return all(map(query, filter(knowledge, models)))
+
+
+def main():
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    names = sorted(symbol.name for symbol in symbols)
+    models = list(itertools.product((True, False), repeat=len(names)))
+    dictionaries = [dict(zip(names, model)) for model in models]
+
+    for name, knowledge in [("Puzzle 0", puzzle.knowledge0),
+                            ("Puzzle 1", puzzle.knowledge1),
+                            ("Puzzle 2", puzzle.knowledge2),
+                            ("Puzzle 3", puzzle.knowledge3)]:
+        start = time.perf_counter()
+        for model in dictionaries:
+            knowledge.evaluate(model)
+        tree = time.perf_counter() - start
+
+        compiled = compile_sentence(knowledge, names)
+        start = time.perf_counter()
+        for model in models:
+            compiled(model)
+        flat = time.perf_counter() - start
+
+        print(f"{name}: evaluate {tree / flat:.1f}x faster "
+              f"({tree * 1e6 / len(models):.2f}us -> "
+              f"{flat * 1e6 / len(models):.2f}us per model)")
+
+    # A larger knowledge base, where enumeration rather than compilation
+    # dominates: a ring of biconditionals over 14 symbols
+    ring = [Symbol(f"P{i}") for i in range(14)]
+    knowledge = And(*[Biconditional(ring[i], ring[(i + 1) % len(ring)])
+                      for i in range(len(ring))])
+    query = Or(ring[0], Not(ring[-1]))
+
+    start = time.perf_counter()
+    tree_model_check(knowledge, query)
+    tree_check = time.perf_counter() - start
+    start = time.perf_counter()
+    model_check(knowledge, query)
+    flat_check = time.perf_counter() - start
+    print(f"model_check over {len(ring)} symbols: {tree_check:.3f}s -> "
+          f"{flat_check:.3f}s ({tree_check / flat_check:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import random
+import sys
+
+import sat
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+STATEMENTS = 1
+DEPTH = 2
+MAX_ATTEMPTS = 1000
+
+
+class Character():
+    """
+    A character in a knights and knaves puzzle, who is either a knight,
+    who always tells the truth, or a knave, who always lies.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.knight = Symbol(f"{name} is a Knight")
+        self.knave = Symbol(f"{name} is a Knave")
+
+    def __repr__(self):
+        return self.name
+
+    def rules(self):
+        """Returns that the character is exactly one of knight and knave."""
+        return And(Or(self.knight, self.knave),
+                   Not(And(self.knight, self.knave)))
+
+    def says(self, statement):
+        """Returns what is known from the character saying `statement`."""
+        return And(Implication(self.knight, statement),
+                   Implication(self.knave, Not(statement)))
+
+
+class Puzzle():
+    """
+    A knights and knaves puzzle: characters and the statements they make,
+    each a logical sentence about which characters are knights or knaves.
+    """
+
+    def __init__(self, characters, statements=()):
+        self.characters = list(characters)
+        self.statements = list(statements)
+
+    def say(self, character, statement):
+        self.statements.append((character, statement))
+
+    def knowledge(self):
+        """Returns everything known, as one sentence."""
+        return And(
+            *[character.rules() for character in self.characters],
+            *[character.says(statement)
+              for character, statement in self.statements]
+        )
+
+    def queries(self):
+        """Returns the symbols to ask about, as puzzle.py does."""
+        return [symbol for character in self.characters
+                for symbol in (character.knight, character.knave)]
+
+    def solution(self):
+        """
+        Returns a dictionary from each character to "Knight" or "Knave",
+        or None for characters whose role cannot be deduced.
+        """
+        knowledge = self.knowledge()
+        solution = dict()
+        for character in self.characters:
+            if sat.model_check(knowledge, character.knight):
+                solution[character] = "Knight"
+            elif sat.model_check(knowledge, character.knave):
+                solution[character] = "Knave"
+            else:
+                solution[character] = None
+        return solution
+
+
+def random_statement(rng, characters, depth):
+    """
+    Returns a random statement about `characters`, nested up to `depth`
+    connectives deep.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        character = rng.choice(characters)
+        return rng.choice([character.knight, character.knave])
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_statement(rng, characters, depth - 1))
+    left = random_statement(rng, characters, depth - 1)
+    right = random_statement(rng, characters, depth - 1)
+    return [And, Or, Implication, Biconditional][kind - 1](left, right)
+
+
+def random_puzzle(n, statements=STATEMENTS, depth=DEPTH, seed=0,
+                  solvable=True):
+    """
+    Returns a random puzzle with `n` characters, each making `statements`
+    statements nested up to `depth` connectives deep.
+
+    If `solvable`, puzzles are drawn until one is consistent and every
+    character's role can be deduced, and a ValueError is raised if none is
+    found in `MAX_ATTEMPTS` attempts.
+    """
+    rng = random.Random(seed)
+    characters = [Character(chr(ord("A") + i) if n <= 26 else f"C{i}")
+                  for i in range(n)]
+    for _ in range(MAX_ATTEMPTS):
+        puzzle = Puzzle(characters)
+        for character in characters:
+            for _ in range(statements):
+                puzzle.say(character,
+                           random_statement(rng, characters, depth))
+        if not solvable:
+            return puzzle
+        if (sat.satisfiable(puzzle.knowledge()) is not None
+                and None not in puzzle.solution().values()):
+            return puzzle
+    raise ValueError(f"no solvable puzzle found in {MAX_ATTEMPTS} attempts")
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4, 5]:
+        sys.exit("Usage: python generator.py characters "
+                 "[statements] [depth] [seed]")
+    n = int(sys.argv[1])
+    statements = int(sys.argv[2]) if len(sys.argv) > 2 else STATEMENTS
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else DEPTH
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    puzzle = random_puzzle(n, statements, depth, seed)
+    for character, statement in puzzle.statements:
+        print(f"{character} says: {statement.formula()}")
+    print()
+    for character, role in puzzle.solution().items():
+        print(f"{character} is a {role}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import time
+
+from bitparallel import benchmark_knowledge
+from logic import (And, Biconditional, Implication, Not, Or, Sentence, Symbol,
+                   model_check as tree_model_check)
+
+SYMBOL, NOT, AND, OR, IMPLIES, IFF = range(6)
+BENCHMARK_SIZES = [10, 12, 14, 16, 20]
+TREE_LIMIT = 16
+
+
+class Circuit():
+    """
+    Sentences compiled into a circuit of nodes, one per structurally
+    distinct subsentence, with children before parents. The value of every
+    node is kept for the current model, and flipping one symbol updates
+    only the nodes whose value may change: conjunctions and disjunctions
+    keep a count of true children, and a node is only re-evaluated if one
+    of its children changed value.
+    """
+
+    def __init__(self, sentences):
+        self.index = dict()
+        self.kinds = []
+        self.children = []
+        self.parents = []
+        self.symbols = []
+        self.roots = [self.node(sentence) for sentence in sentences]
+        size = len(self.kinds)
+
+        # Start from the model in which every symbol is false
+        self.values = [False] * size
+        self.counts = [0] * size
+        for node in range(size):
+            self.values[node] = self.evaluate(node)
+            self.counts[node] = sum(self.values[c]
+                                    for c in self.children[node])
+        self.pending = [False] * size
+
+        # Nodes that depend on each symbol, in evaluation order
+        self.affected = []
+        for symbol in self.symbols:
+            reached = {symbol}
+            for node in range(symbol + 1, size):
+                if any(c in reached for c in self.children[node]):
+                    reached.add(node)
+            self.affected.append(sorted(reached - {symbol}))
+
+    def node(self, sentence):
+        """Returns the node for `sentence`, adding it and its children."""
+        Sentence.validate(sentence)
+        if sentence in self.index:
+            return self.index[sentence]
+        if isinstance(sentence, Symbol):
+            kind, children = SYMBOL, []
+        elif isinstance(sentence, Not):
+            kind, children = NOT, [sentence.operand]
+        elif isinstance(sentence, And):
+            kind, children = AND, sentence.conjuncts
+        elif isinstance(sentence, Or):
+            kind, children = OR, sentence.disjuncts
+        elif isinstance(sentence, Implication):
+            kind, children = IMPLIES, [sentence.antecedent,
+                                       sentence.consequent]
+        elif isinstance(sentence, Biconditional):
+            kind, children = IFF, [sentence.left, sentence.right]
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        children = tuple(self.node(child) for child in children)
+        node = len(self.kinds)
+        self.kinds.append(kind)
+        self.children.append(children)
+        self.parents.append([])
+        for child in children:
+            self.parents[child].append(node)
+        if kind == SYMBOL:
+            self.symbols.append(node)
+        self.index[sentence] = node
+        return node
+
+    def evaluate(self, node):
+        """Returns the value of `node` computed from its children's values."""
+        kind = self.kinds[node]
+        values = [self.values[c] for c in self.children[node]]
+        if kind == SYMBOL:
+            return self.values[node]
+        if kind == NOT:
+            return not values[0]
+        if kind == AND:
+            return all(values)
+        if kind == OR:
+            return any(values)
+        if kind == IMPLIES:
+            return not values[0] or values[1]
+        return values[0] == values[1]
+
+    def changed(self, node):
+        """Updates the parents of `node` after its value has changed."""
+        delta = 1 if self.values[node] else -1
+        for parent in self.parents[node]:
+            self.counts[parent] += delta
+            self.pending[parent] = True
+
+    def flip(self, position):
+        """Flips the value of the symbol at `position` in `symbols`."""
+        symbol = self.symbols[position]
+        values, counts, kinds = self.values, self.counts, self.kinds
+        children, pending = self.children, self.pending
+        values[symbol] = not values[symbol]
+        self.changed(symbol)
+
+        for node in self.affected[position]:
+            if not pending[node]:
+                continue
+            pending[node] = False
+            kind = kinds[node]
+            if kind == AND:
+                value = counts[node] == len(children[node])
+            elif kind == OR:
+                value = counts[node] > 0
+            elif kind == NOT:
+                value = not values[children[node][0]]
+            elif kind == IMPLIES:
+                left, right = children[node]
+                value = not values[left] or values[right]
+            else:
+                left, right = children[node]
+                value = values[left] == values[right]
+            if value != values[node]:
+                values[node] = value
+                self.changed(node)
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, without recursion or copying
+    models. Models are visited in Gray code order, so each differs from
+    the last in one symbol, and only the subsentences depending on that
+    symbol are re-evaluated.
+
+    Building the circuit costs more than a few hundred models save: on
+    puzzles under about 12 symbols (6 characters) this is 1.5-3x slower
+    than logic.model_check, and it only wins above that.
+    """
+    circuit = Circuit([knowledge, query])
+    values = circuit.values
+    kb, q = circuit.roots
+    if values[kb] and not values[q]:
+        return False
+    for step in range(1, 2 ** len(circuit.symbols)):
+
+        # The bit that changes between consecutive Gray codes
+        circuit.flip((step & -step).bit_length() - 1)
+        if values[kb] and not values[q]:
+            return False
+    return True
+
+
+def main():
+    for size in BENCHMARK_SIZES:
+        knowledge, query = benchmark_knowledge(size)
+        start = time.perf_counter()
+        result = model_check(knowledge, query)
+        gray = time.perf_counter() - start
+        line = f"{size} symbols: Gray code {gray:.3f}s"
+
+        if size <= TREE_LIMIT:
+            start = time.perf_counter()
+            if tree_model_check(knowledge, query) != result:
+                raise RuntimeError("model checkers disagree")
+            tree = time.perf_counter() - start
+            line += f", check_all {tree:.3f}s ({tree / gray:.1f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import gc
+import pickle
+import random
+import time
+import tracemalloc
+import weakref
+
+import logic
+from logic import Sentence
+
+KNOWLEDGE_SIZES = [1000, 10000, 50000]
+SYMBOL_COUNT = 12
+DEPTH = 4
+
+# Every live interned sentence, keyed by its class and fields
+nodes = weakref.WeakValueDictionary()
+
+# One shared frozenset for each distinct symbol set of a live interned
+# sentence, keyed by its sorted names, so it is freed with the last
+# sentence that uses it
+symbol_sets = weakref.WeakValueDictionary()
+
+
+class Interned():
+    """
+    Mixin for hash-consed sentences: structurally equal interned sentences
+    are the same object, so equality is an identity check. Each node
+    caches its hash and symbol set when it is created, and cannot be
+    changed afterwards. The hash is the one the plain logic.py class would
+    compute, so interned and plain sentences can be mixed in sets and
+    dictionaries. Unpickling goes back through the constructor, so it
+    returns the interned sentence.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def node(cls, fields, symbols, hash_value):
+        """
+        Returns the interned sentence of class `cls` with `fields`,
+        creating it, with its symbol set and hash, if it does not exist.
+        """
+        key = (cls,) + fields
+        node = nodes.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in zip(cls.fields, fields):
+                object.__setattr__(node, name, value)
+            names = tuple(sorted(symbols))
+            shared = symbol_sets.get(names)
+            if shared is None:
+                shared = symbol_sets[names] = symbols
+            object.__setattr__(node, "cached_symbols", shared)
+            object.__setattr__(node, "cached_hash", hash_value)
+            nodes[key] = node
+        return node
+
+    def __init__(self, *args):
+        pass
+
+    def __setattr__(self, name, value):
+        raise AttributeError("interned sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("interned sentences are immutable")
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Interned) or not isinstance(other, Sentence):
+            return False
+        return intern(other) is self
+
+    def __hash__(self):
+        return self.cached_hash
+
+    def symbols(self):
+        return set(self.cached_symbols)
+
+
+class Symbol(Interned, logic.Symbol):
+    __slots__ = ("cached_symbols", "cached_hash", "__weakref__")
+    fields = ("name",)
+
+    def __new__(cls, name):
+        return cls.node((name,), frozenset([name]), hash(("symbol", name)))
+
+    def __reduce__(self):
+        return Symbol, (self.name,)
+
+
+class Not(Interned, logic.Not):
+    __slots__ = ("cached_symbols", "cached_hash", "__weakref__")
+    fields = ("operand",)
+
+    def __new__(cls, operand):
+        operand = intern(operand)
+        return cls.node((operand,), operand.cached_symbols,
+                        hash(("not", operand.cached_hash)))
+
+    def __reduce__(self):
+        return Not, (self.operand,)
+
+
+class And(Interned, logic.And):
+    __slots__ = ("cached_symbols", "cached_hash", "__weakref__")
+    fields = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
+        conjuncts = tuple(intern(conjunct) for conjunct in conjuncts)
+        return cls.node(
+            (conjuncts,),
+            frozenset().union(*[c.cached_symbols for c in conjuncts]),
+            hash(("and", tuple(c.cached_hash for c in conjuncts)))
+        )
+
+    def __reduce__(self):
+        return And, self.conjuncts
+
+    def add(self, conjunct):
+        raise AttributeError("interned sentences are immutable")
+
+
+class Or(Interned, logic.Or):
+    __slots__ = ("cached_symbols", "cached_hash", "__weakref__")
+    fields = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
+        disjuncts = tuple(intern(disjunct) for disjunct in disjuncts)
+        return cls.node(
+            (disjuncts,),
+            frozenset().union(*[d.cached_symbols for d in disjuncts]),
+            hash(("or", tuple(d.cached_hash for d in disjuncts)))
+        )
+
+    def __reduce__(self):
+        return Or, self.disjuncts
+
+
+class Implication(Interned, logic.Implication):
+    __slots__ = ("cached_symbols", "cached_hash", "__weakref__")
+    fields = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
+        antecedent = intern(antecedent)
+        consequent = intern(consequent)
+        return cls.node(
+            (antecedent, consequent),
+            antecedent.cached_symbols | consequent.cached_symbols,
+            hash(("implies", antecedent.cached_hash, consequent.cached_hash))
+        )
+
+    def __reduce__(self):
+        return Implication, (self.antecedent, self.consequent)
+
+
+class Biconditional(Interned, logic.Biconditional):
+    __slots__ = ("cached_symbols", "cached_hash", "__weakref__")
+    fields = ("left", "right")
+
+    def __new__(cls, left, right):
+        left = intern(left)
+        right = intern(right)
+        return cls.node(
+            (left, right),
+            left.cached_symbols | right.cached_symbols,
+            hash(("biconditional", left.cached_hash, right.cached_hash))
+        )
+
+    def __reduce__(self):
+        return Biconditional, (self.left, self.right)
+
+
+def intern(sentence):
+    """
+    Returns the interned sentence structurally equal to `sentence`, which
+    may be a plain logic.py sentence or already interned.
+    """
+    Sentence.validate(sentence)
+    if isinstance(sentence, Interned):
+        return sentence
+    if isinstance(sentence, logic.Symbol):
+        return Symbol(sentence.name)
+    if isinstance(sentence, logic.Not):
+        return Not(sentence.operand)
+    if isinstance(sentence, logic.And):
+        return And(*sentence.conjuncts)
+    if isinstance(sentence, logic.Or):
+        return Or(*sentence.disjuncts)
+    if isinstance(sentence, logic.Implication):
+        return Implication(sentence.antecedent, sentence.consequent)
+    if isinstance(sentence, logic.Biconditional):
+        return Biconditional(sentence.left, sentence.right)
+    raise TypeError(f"cannot intern {type(sentence).__name__}")
+
+
+def random_sentence(rng, symbols, depth):
+    """
+    Returns a random plain sentence over `symbols`, nested up to `depth`
+    connectives deep.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(symbols)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return logic.Not(random_sentence(rng, symbols, depth - 1))
+    if kind in (1, 2):
+        parts = [random_sentence(rng, symbols, depth - 1)
+                 for _ in range(rng.randint(2, 3))]
+        return logic.And(*parts) if kind == 1 else logic.Or(*parts)
+    left = random_sentence(rng, symbols, depth - 1)
+    right = random_sentence(rng, symbols, depth - 1)
+    if kind == 3:
+        return logic.Implication(left, right)
+    return logic.Biconditional(left, right)
+
+
+def measure(function):
+    """
+    Returns `function()`, its wall time in seconds and the memory its
+    result holds, in bytes, as left allocated after the call.
+    """
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    result = function()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, allocated
+
+
+def check_pickle(seed=0):
+    """
+    Checks that pickling and unpickling interned sentences, as
+    multiprocessing does, gives back the same interned objects.
+    """
+    rng = random.Random(seed)
+    symbols = [logic.Symbol(f"P{i}") for i in range(SYMBOL_COUNT)]
+    knowledge = intern(logic.And(*[random_sentence(rng, symbols, DEPTH)
+                                   for _ in range(100)]))
+    if pickle.loads(pickle.dumps(knowledge)) is not knowledge:
+        raise RuntimeError("unpickled sentence is not the interned one")
+
+
+def main():
+    check_pickle()
+    symbols = [logic.Symbol(f"P{i}") for i in range(SYMBOL_COUNT)]
+    for size in KNOWLEDGE_SIZES:
+
+        def build():
+            rng = random.Random(size)
+            return logic.And(*[random_sentence(rng, symbols, DEPTH)
+                               for _ in range(size)])
+
+        plain, plain_seconds, plain_bytes = measure(build)
+        copy = build()
+        interned, interned_seconds, interned_bytes = measure(
+            lambda: intern(build())
+        )
+        other = intern(copy)
+        print(f"{size} sentences: {len(set(plain.conjuncts))} distinct, "
+              f"{len(nodes)} interned nodes")
+        print(f"  build: plain {plain_seconds:.3f}s, "
+              f"{plain_bytes / 1024:.0f} KiB; "
+              f"interned {interned_seconds:.3f}s, "
+              f"{interned_bytes / 1024:.0f} KiB")
+
+        for name, operation in [
+            ("hash", lambda kb, _: hash(kb)),
+            ("equality", lambda kb, other: kb == other),
+            ("dedupe", lambda kb, _: len(set(kb.conjuncts))),
+            ("symbols", lambda kb, _: [c.symbols() for c in kb.conjuncts])
+        ]:
+            gc.collect()
+            start = time.perf_counter()
+            operation(plain, copy)
+            slow = time.perf_counter() - start
+            gc.collect()
+            start = time.perf_counter()
+            operation(interned, other)
+            fast = time.perf_counter() - start
+            print(f"  {name}: {slow:.4f}s -> {fast:.4f}s "
+                  f"({slow / max(fast, 1e-9):.0f}x)")
+        del interned, other
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import time
+
+import puzzle
+from bitparallel import evaluate
+from logic import And, Not, Sentence, Symbol, model_check
+from sat import CNF, Solver
+
+TABLE_LIMIT = 20
+
+
+class KnowledgeBase():
+    """
+    A knowledge base that answers many entailment queries without
+    re-enumerating its models for each one.
+
+    Up to `TABLE_LIMIT` symbols, the models that satisfy the knowledge are
+    kept as a truth table: an integer whose bit m is set if model m is
+    satisfying, where bit `i` of m is the value of the `i`th symbol. Each
+    new symbol doubles the table and each added sentence masks it, so
+    adding knowledge never starts from scratch. With more symbols, the
+    knowledge is kept as clauses for a SAT solver instead, and a query is
+    entailed if the clauses are unsatisfiable when it is assumed false.
+
+    Answers are cached by query. Adding knowledge only removes models, so
+    queries already entailed stay entailed and only the rest are dropped.
+    """
+
+    def __init__(self, *sentences, table_limit=TABLE_LIMIT):
+        self.table_limit = table_limit
+        self.sentences = []
+        self.symbols = []
+        self.columns = dict()
+        self.table = 1
+        self.cnf = None
+        self.solver = None
+        self.synced = 0
+        self.cache = dict()
+        for sentence in sentences:
+            self.add(sentence)
+
+    @property
+    def full(self):
+        """The truth table in which every model is satisfying."""
+        return (1 << (1 << len(self.symbols))) - 1
+
+    def register(self, symbols):
+        """Adds any of `symbols` not yet known to the knowledge base."""
+        for name in sorted(set(symbols) - set(self.columns)):
+            if self.cnf is not None:
+                self.columns[name] = None
+                self.symbols.append(name)
+                continue
+            if len(self.symbols) == self.table_limit:
+                self.switch_to_solver()
+                self.columns[name] = None
+                self.symbols.append(name)
+                continue
+
+            # Models with the new symbol true repeat those with it false
+            size = 1 << len(self.symbols)
+            for known in self.symbols:
+                self.columns[known] |= self.columns[known] << size
+            self.columns[name] = ((1 << size) - 1) << size
+            self.symbols.append(name)
+            self.table |= self.table << size
+
+    def switch_to_solver(self):
+        """Moves the knowledge from the truth table into SAT clauses."""
+        self.cnf = CNF()
+        for sentence in self.sentences:
+            self.cnf.add(sentence)
+        self.solver = Solver()
+        self.synced = 0
+        self.columns = dict.fromkeys(self.columns)
+        self.table = None
+
+    def sync_solver(self):
+        """Passes clauses added to the CNF since the last call to the solver."""
+        for clause in self.cnf.clauses[self.synced:]:
+            self.solver.add_clause(clause)
+        self.synced = len(self.cnf.clauses)
+        self.solver.count = max(self.solver.count, self.cnf.count)
+
+    def add(self, sentence):
+        """Adds `sentence` to the knowledge base, as a new conjunct."""
+        Sentence.validate(sentence)
+        self.register(sentence.symbols())
+        self.sentences.append(sentence)
+        if self.cnf is not None:
+            self.cnf.add(sentence)
+        else:
+            self.table &= evaluate(sentence, self.columns, self.full, dict())
+        self.cache = {query: True for query, entailed in self.cache.items()
+                      if entailed}
+
+    def satisfiable(self):
+        """Returns whether any model satisfies the knowledge base."""
+        if self.cnf is None:
+            return self.table != 0
+        self.sync_solver()
+        return self.solver.solve()
+
+    def entails(self, query):
+        """Returns whether the knowledge base entails `query`."""
+        Sentence.validate(query)
+        if query in self.cache:
+            return self.cache[query]
+
+        self.register(query.symbols())
+        if self.cnf is not None:
+            literal = self.cnf.encode(query)
+            self.sync_solver()
+            entailed = not self.solver.solve(assumptions=[-literal])
+        else:
+            table = evaluate(query, self.columns, self.full, dict())
+            entailed = not self.table & ~table
+        self.cache[query] = entailed
+        return entailed
+
+
+def main():
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    knowledge = [puzzle.knowledge0, puzzle.knowledge1,
+                 puzzle.knowledge2, puzzle.knowledge3]
+
+    start = time.perf_counter()
+    separate = [[model_check(k, symbol) for symbol in symbols]
+                for k in knowledge]
+    tree = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shared = []
+    for k in knowledge:
+        base = KnowledgeBase(k)
+        shared.append([base.entails(symbol) for symbol in symbols])
+    table = time.perf_counter() - start
+    if shared != separate:
+        raise RuntimeError("knowledge base disagrees with model_check")
+    print(f"Puzzles: model_check per query {tree:.4f}s, "
+          f"knowledge base {table:.4f}s ({tree / table:.0f}x)")
+
+    # Knowledge added one conjunct at a time over a chain of 30 symbols,
+    # beyond the truth table limit, queried after each addition
+    chain = [Symbol(f"P{i:02}") for i in range(30)]
+    base = KnowledgeBase(chain[0])
+    start = time.perf_counter()
+    for i in range(len(chain) - 1):
+        base.add(Not(And(chain[i], Not(chain[i + 1]))))
+        if not base.entails(chain[i + 1]):
+            raise RuntimeError("chain should entail every symbol")
+    print(f"Chain of {len(chain)} symbols, incremental: "
+          f"{time.perf_counter() - start:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
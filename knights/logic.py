@@ -1,6 +1,7 @@
 import itertools
 
 class Sentence():
+    __slots__ = ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -42,6 +43,7 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
         self.name = name
@@ -69,6 +71,8 @@ class Symbol(Sentence):
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
@@ -93,6 +97,8 @@ class Not(Sentence):
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
@@ -126,10 +132,12 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set().union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
@@ -157,10 +165,12 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set().union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -192,6 +202,8 @@ class Implication(Sentence):
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -216,8 +228,8 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
@@ -0,0 +1,136 @@
+import itertools
+import math
+import os
+import sys
+import time
+from multiprocessing import get_context
+
+from hashcons import intern
+from logic import (And, Biconditional, Not, Or, Sentence, Symbol,
+                   model_check as tree_model_check)
+
+TASKS_PER_PROCESS = 4
+BENCHMARK_SYMBOLS = 16
+
+# Knowledge base, query and symbol order shared by every task in a worker
+problem = None
+
+
+def initialize(knowledge, query, symbols):
+    """Stores the problem in a worker process, so tasks only send prefixes."""
+    global problem
+    problem = (knowledge, query, symbols)
+
+
+def check_subproblem(prefix):
+    """
+    Returns whether the query holds in every model of the knowledge base
+    in which the first symbols have the truth values in `prefix`.
+    """
+    knowledge, query, symbols = problem
+    model = dict(zip(symbols, prefix))
+    rest = symbols[len(prefix):]
+    for values in itertools.product((True, False), repeat=len(rest)):
+        model.update(zip(rest, values))
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False
+    return True
+
+
+def parallel_model_check(knowledge, query, processes=None, k=None,
+                         start_method=None):
+    """
+    Checks if knowledge base entails query, enumerating models across a
+    pool of `processes` processes.
+
+    The models are split into 2^k subproblems by the values of the first
+    k symbols, about `TASKS_PER_PROCESS` per process by default. As soon
+    as any subproblem finds a model in which knowledge is true and query
+    is false, the pool is terminated and the remaining subproblems are
+    abandoned.
+
+    Workers receive the problem by pickle through the pool initializer,
+    rather than inheriting it from the parent, so any `start_method`
+    ("fork", "spawn" or "forkserver") works, with plain or interned
+    sentences; None uses the platform default.
+    """
+    Sentence.validate(knowledge)
+    Sentence.validate(query)
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    processes = processes or os.cpu_count() or 1
+    if k is None:
+        k = math.ceil(math.log2(processes * TASKS_PER_PROCESS))
+    k = min(k, len(symbols))
+    prefixes = itertools.product((True, False), repeat=k)
+
+    context = get_context(start_method)
+    with context.Pool(processes, initialize,
+                      (knowledge, query, symbols)) as pool:
+        for entailed in pool.imap_unordered(check_subproblem, prefixes):
+            if not entailed:
+                return False
+    return True
+
+
+def benchmark_knowledge(size):
+    """
+    Returns a ring of biconditionals over `size` symbols, which holds only
+    when every symbol has the same value, with a query it entails and a
+    query it does not.
+    """
+    ring = [Symbol(f"P{i:02}") for i in range(size)]
+    knowledge = And(*[Biconditional(ring[i], ring[(i + 1) % size])
+                      for i in range(size)])
+    return knowledge, Or(Not(ring[0]), ring[-1]), ring[-1]
+
+
+def benchmark(size=BENCHMARK_SYMBOLS):
+    """
+    Reports the time taken with 1 to N processes, N being the number of
+    CPUs, against the serial `model_check` in logic.py, for a query that
+    needs every model checked and one with a counter-model.
+    """
+    knowledge, entailed, not_entailed = benchmark_knowledge(size)
+    cpus = os.cpu_count() or 1
+    for name, query in [("entailed", entailed),
+                        ("not entailed", not_entailed)]:
+        start = time.perf_counter()
+        expected = tree_model_check(knowledge, query)
+        serial = time.perf_counter() - start
+        print(f"{size} symbols, {name}: serial check_all {serial:.3f}s")
+        for processes in range(1, cpus + 1):
+            start = time.perf_counter()
+            if parallel_model_check(knowledge, query, processes) != expected:
+                raise RuntimeError("parallel model_check disagrees")
+            elapsed = time.perf_counter() - start
+            print(f"  {processes} processes: {elapsed:.3f}s "
+                  f"({serial / elapsed:.2f}x)")
+
+
+def check_start_methods(size=8):
+    """
+    Checks that the fork and spawn start methods, where available, give
+    the serial answers for plain and interned sentences.
+    """
+    knowledge, entailed, not_entailed = benchmark_knowledge(size)
+    for start_method in ["fork", "spawn"]:
+        try:
+            get_context(start_method)
+        except ValueError:
+            continue
+        for kb, query in [(knowledge, entailed), (knowledge, not_entailed),
+                          (intern(knowledge), intern(entailed))]:
+            if (parallel_model_check(kb, query, 2, start_method=start_method)
+                    != tree_model_check(knowledge, query)):
+                raise RuntimeError(f"{start_method} pool disagrees")
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python parallel.py [symbols]")
+    check_start_methods()
+    benchmark(int(sys.argv[1]) if len(sys.argv) == 2 else BENCHMARK_SYMBOLS)
+
+
+if __name__ == "__main__":
+    main()
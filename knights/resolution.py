@@ -0,0 +1,288 @@
+import heapq
+import time
+
+from generator import random_puzzle
+from logic import (And, Biconditional, Implication, Not, Or, Symbol,
+                   model_check as tree_model_check)
+from sat import CNF, Solver
+
+MAX_CLAUSES = 20000
+DIRECT_LIMIT = 256
+BENCHMARK_SIZES = [2, 3, 4, 5, 6, 8, 16, 32]
+CHECK_LIMIT = 6
+
+
+class Prover():
+    """
+    A resolution theorem prover over the clauses of a knowledge base and a
+    negated query.
+
+    Resolution uses the set-of-support strategy: every resolution has at
+    least one parent derived from the negated query, so the prover only
+    explores consequences relevant to the query. Each clause is a
+    frozenset of literals, and an index from each literal to the clauses
+    containing it finds the clauses a given clause resolves with, and the
+    candidates for subsumption, without scanning every pair. New clauses
+    subsumed by existing ones are discarded, and existing clauses subsumed
+    by a new one are deleted.
+    """
+
+    def __init__(self, max_clauses=MAX_CLAUSES):
+        self.max_clauses = max_clauses
+        self.clauses = []
+        self.index = dict()
+        self.units = dict()
+        self.supported = set()
+        self.support = []
+        self.contradiction = False
+        self.stats = dict.fromkeys(
+            ["clauses_generated", "clauses_kept", "subsumed", "deleted"], 0
+        )
+        self.stats["exhausted"] = False
+
+    def subsuming(self, clause):
+        """Returns an existing clause that is a subset of `clause`, or None."""
+        for literal in clause:
+            for i in self.index.get(literal, ()):
+                if self.clauses[i] <= clause:
+                    return i
+        return None
+
+    def delete(self, i):
+        """Deletes the clause numbered `i`."""
+        for literal in self.clauses[i]:
+            self.index[literal].discard(i)
+        self.clauses[i] = None
+        self.stats["deleted"] += 1
+
+    def delete_subsumed(self, clause):
+        """
+        Deletes every existing clause that `clause` is a subset of, and
+        returns whether any of them was in the set of support.
+        """
+        rarest = min(clause, key=lambda l: len(self.index.get(l, ())))
+        support = False
+        for i in list(self.index.get(rarest, ())):
+            if clause <= self.clauses[i]:
+                support = support or i in self.supported
+                self.delete(i)
+        return support
+
+    def enqueue(self, i):
+        """Adds clause `i` to the set of support, to be resolved."""
+        self.supported.add(i)
+        heapq.heappush(self.support, (len(self.clauses[i]), i))
+
+    def add(self, clause, support):
+        """
+        Adds `clause` unless it is a tautology or subsumed, deleting the
+        clauses it subsumes. Literals contradicting a unit clause are
+        removed first, and a new unit clause removes its negation from the
+        existing clauses.
+
+        A clause simplified by, or subsuming, a clause in the set of
+        support joins the set of support, and a clause subsuming a new
+        clause in the set of support is added to it, so that no resolution
+        with the negated query is lost.
+        """
+        queue = [(clause, support)]
+        while queue:
+            clause, support = queue.pop()
+            clause = frozenset(clause)
+            if any(-literal in clause for literal in clause):
+                continue
+            falsified = [l for l in clause if -l in self.units]
+            if falsified:
+                clause = clause.difference(falsified)
+                support = support or any(self.units[-l] in self.supported
+                                         for l in falsified)
+
+            subsuming = self.subsuming(clause)
+            if subsuming is not None:
+                self.stats["subsumed"] += 1
+                if support and subsuming not in self.supported:
+                    self.enqueue(subsuming)
+                continue
+            if clause:
+                support = self.delete_subsumed(clause) or support
+            else:
+                self.contradiction = True
+
+            i = len(self.clauses)
+            self.clauses.append(clause)
+            for literal in clause:
+                self.index.setdefault(literal, set()).add(i)
+            if support:
+                self.enqueue(i)
+            self.stats["clauses_kept"] += 1
+
+            if len(clause) == 1:
+                (literal,) = clause
+                self.units[literal] = i
+                for j in list(self.index.get(-literal, ())):
+                    queue.append((
+                        self.clauses[j] - {-literal},
+                        support or j in self.supported
+                    ))
+                    self.delete(j)
+
+    def refute(self):
+        """
+        Resolves clauses from the set of support, shortest first, with
+        every clause they share a complementary literal with, until the
+        empty clause is derived or no new clauses can be. Returns whether
+        the empty clause was derived, or None if more than `max_clauses`
+        clauses were generated first.
+        """
+        while self.support and not self.contradiction:
+            _, i = heapq.heappop(self.support)
+            given = self.clauses[i]
+            for literal in given or ():
+                for j in list(self.index.get(-literal, ())):
+                    other = self.clauses[j]
+                    if other is None:
+                        continue
+                    self.stats["clauses_generated"] += 1
+                    if self.stats["clauses_generated"] > self.max_clauses:
+                        self.stats["exhausted"] = True
+                        return None
+                    self.add((given - {literal}) | (other - {-literal}), True)
+                    if self.contradiction:
+                        return True
+
+                    # The given clause may have been simplified or subsumed
+                    if self.clauses[i] is None:
+                        break
+                if self.clauses[i] is None:
+                    break
+        return self.contradiction
+
+
+def clauses(sentence, cnf, positive=True):
+    """
+    Returns the clauses of `sentence`, or of its negation if not
+    `positive`, converted to CNF directly by distributing disjunction over
+    conjunction, with symbols numbered as variables of `cnf`. Raises
+    OverflowError if there would be more than `DIRECT_LIMIT` clauses.
+    """
+    if isinstance(sentence, Symbol):
+        variable = cnf.variable(sentence.name)
+        return [frozenset([variable if positive else -variable])]
+    if isinstance(sentence, Not):
+        return clauses(sentence.operand, cnf, not positive)
+    if isinstance(sentence, Implication):
+        parts = [(sentence.antecedent, not positive),
+                 (sentence.consequent, positive)]
+        conjunction = not positive
+    elif isinstance(sentence, Biconditional):
+        left, right = sentence.left, sentence.right
+        if positive:
+            return (clauses(Implication(left, right), cnf)
+                    + clauses(Implication(right, left), cnf))
+        return clauses(Or(left, right), cnf) + clauses(
+            Or(Not(left), Not(right)), cnf)
+    elif isinstance(sentence, And):
+        parts = [(c, positive) for c in sentence.conjuncts]
+        conjunction = positive
+    elif isinstance(sentence, Or):
+        parts = [(d, positive) for d in sentence.disjuncts]
+        conjunction = not positive
+    else:
+        raise TypeError(f"cannot convert {type(sentence).__name__}")
+
+    if conjunction:
+        result = []
+        for part, polarity in parts:
+            result.extend(clauses(part, cnf, polarity))
+    else:
+        result = [frozenset()]
+        for part, polarity in parts:
+            result = [a | b for a in result
+                      for b in clauses(part, cnf, polarity)
+                      if not any(-literal in a for literal in b)]
+            if len(result) > DIRECT_LIMIT:
+                raise OverflowError("too many clauses for direct CNF")
+    if len(result) > DIRECT_LIMIT:
+        raise OverflowError("too many clauses for direct CNF")
+    return result
+
+
+def assert_sentence(cnf, sentence):
+    """
+    Adds the clauses of `sentence` to `cnf`. Each conjunct is converted
+    directly if that gives few enough clauses, and by the Tseitin
+    transformation otherwise.
+    Direct conversion avoids auxiliary variables, each of which gives
+    resolution many more clauses to derive.
+    """
+    if isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            assert_sentence(cnf, conjunct)
+        return
+    try:
+        cnf.clauses.extend(list(clause) for clause in clauses(sentence, cnf))
+    except OverflowError:
+        cnf.add(sentence)
+
+
+def prove(knowledge, query, max_clauses=MAX_CLAUSES):
+    """
+    Returns whether knowledge base entails query, proved by refuting
+    knowledge together with the negation of query, and a dictionary of
+    statistics: clauses generated, kept, discarded as subsumed and
+    deleted, whether the clause budget was exhausted, and the time taken
+    in seconds.
+
+    Set-of-support resolution is only complete when the knowledge base is
+    consistent, so if no refutation is found the knowledge base is checked
+    with the DPLL solver, and an inconsistent one entails every query. If
+    more than `max_clauses` clauses are generated, resolution gives up and
+    the DPLL solver decides the same clauses instead.
+    """
+    start = time.perf_counter()
+    cnf = CNF()
+    assert_sentence(cnf, knowledge)
+    knowledge_clauses = len(cnf.clauses)
+    assert_sentence(cnf, Not(query))
+
+    prover = Prover(max_clauses)
+    for position, clause in enumerate(cnf.clauses):
+        prover.add(clause, position >= knowledge_clauses)
+    entailed = prover.refute()
+    if entailed is None:
+        entailed = not Solver(cnf).solve()
+    elif not entailed:
+        consistent = CNF()
+        consistent.add(knowledge)
+        entailed = not Solver(consistent).solve()
+    prover.stats["seconds"] = time.perf_counter() - start
+    return entailed, prover.stats
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query, by resolution."""
+    return prove(knowledge, query)[0]
+
+
+def main():
+    for n in BENCHMARK_SIZES:
+        puzzle = random_puzzle(n)
+        knowledge = puzzle.knowledge()
+        generated = 0
+        exhausted = 0
+        seconds = 0
+        for query in puzzle.queries():
+            entailed, stats = prove(knowledge, query)
+            if (n <= CHECK_LIMIT
+                    and entailed != tree_model_check(knowledge, query)):
+                raise RuntimeError("resolution disagrees with model_check")
+            generated += stats["clauses_generated"]
+            exhausted += stats["exhausted"]
+            seconds += stats["seconds"]
+        print(f"{n} characters: {len(puzzle.queries())} queries, "
+              f"{generated} clauses generated, {exhausted} decided by DPLL, "
+              f"{seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+
+
+class CNF():
+    """
+    A formula in conjunctive normal form, built from logical sentences by
+    the Tseitin transformation.
+
+    Variables are numbered from 1 and a literal is a variable number,
+    negated if the variable is false. Each compound subsentence is given a
+    fresh variable defined to be equivalent to it, so the clauses grow
+    linearly with the size of the sentences rather than exponentially,
+    and are satisfiable exactly when the sentences are.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.variables = dict()
+        self.names = dict()
+        self.count = 0
+        self.definitions = dict()
+
+    def variable(self, name):
+        """Returns the variable for symbol `name`, creating it if needed."""
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+            self.names[self.count] = name
+        return self.variables[name]
+
+    def fresh(self):
+        """Returns a new auxiliary variable."""
+        self.count += 1
+        return self.count
+
+    def encode(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses that
+        define it. Structurally equal subsentences share one literal.
+        """
+        Sentence.validate(sentence)
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.encode(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, And):
+            literals = [self.encode(c) for c in sentence.conjuncts]
+            x = self.fresh()
+            for literal in literals:
+                self.clauses.append([-x, literal])
+            self.clauses.append([x] + [-literal for literal in literals])
+        elif isinstance(sentence, (Or, Implication)):
+            if isinstance(sentence, Or):
+                literals = [self.encode(d) for d in sentence.disjuncts]
+            else:
+                literals = [-self.encode(sentence.antecedent),
+                            self.encode(sentence.consequent)]
+            x = self.fresh()
+            for literal in literals:
+                self.clauses.append([x, -literal])
+            self.clauses.append([-x] + literals)
+        elif isinstance(sentence, Biconditional):
+            a = self.encode(sentence.left)
+            b = self.encode(sentence.right)
+            x = self.fresh()
+            self.clauses.extend([
+                [-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]
+            ])
+        else:
+            raise TypeError(f"cannot encode {type(sentence).__name__}")
+
+        self.definitions[sentence] = x
+        return x
+
+    def add(self, sentence):
+        """Asserts that `sentence` is true."""
+        self.clauses.append([self.encode(sentence)])
+
+
+class Solver():
+    """
+    A DPLL satisfiability solver with unit propagation over two watched
+    literals per clause and chronological backtracking.
+    """
+
+    def __init__(self, cnf=None):
+        self.clauses = []
+        self.count = 0
+        self.model = None
+        if cnf is not None:
+            for clause in cnf.clauses:
+                self.add_clause(clause)
+            self.count = max(self.count, cnf.count)
+
+    def add_clause(self, clause):
+        """Adds a clause, given as an iterable of literals."""
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        self.clauses.append(clause)
+        self.count = max([self.count] + [abs(literal) for literal in clause])
+
+    def value(self, literal):
+        """Returns True, False or None for the current assignment."""
+        value = self.assignment[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def enqueue(self, literal):
+        self.assignment[abs(literal)] = literal > 0
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Propagates unit clauses from the trail. Returns False on conflict.
+        """
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches.get(false_literal, [])
+            kept = []
+            for position, index in enumerate(watchers):
+                clause = self.clauses[index]
+
+                # Keep the falsified watch in the second position
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        kept.extend(watchers[position + 1:])
+                        self.watches[false_literal] = kept
+                        return False
+                    self.enqueue(clause[0])
+            self.watches[false_literal] = kept
+        return True
+
+    def backtrack(self, level):
+        """Undoes every assignment made above decision level `level`."""
+        start = self.levels[level]
+        for literal in self.trail[start:]:
+            self.assignment[abs(literal)] = None
+        del self.trail[start:]
+        del self.levels[level:]
+        del self.decisions[level:]
+        self.head = len(self.trail)
+
+    def reset(self):
+        """
+        Clears the assignment and rebuilds the watches. Returns False if
+        the clauses are unsatisfiable by unit propagation alone.
+        """
+        self.assignment = [None] * (self.count + 1)
+        self.trail = []
+        self.levels = []
+        self.decisions = []
+        self.head = 0
+        self.watches = dict()
+
+        # Order variables for branching by how often they occur
+        occurrences = [0] * (self.count + 1)
+        for clause in self.clauses:
+            for literal in clause:
+                occurrences[abs(literal)] += 1
+        self.order = sorted(range(1, self.count + 1),
+                            key=lambda v: -occurrences[v])
+
+        for index, clause in enumerate(self.clauses):
+            if not clause:
+                return False
+            if len(clause) == 1:
+                value = self.value(clause[0])
+                if value is False:
+                    return False
+                if value is None:
+                    self.enqueue(clause[0])
+            else:
+                self.watches.setdefault(clause[0], []).append(index)
+                self.watches.setdefault(clause[1], []).append(index)
+        return self.propagate()
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses, together with the literals in
+        `assumptions`, are satisfiable. If so, the satisfying assignment is
+        stored in `model` as a dictionary from variable to bool.
+        """
+        self.model = None
+        if not self.reset():
+            return False
+
+        # Assumptions are decisions that may never be flipped
+        for literal in assumptions:
+            value = self.value(literal)
+            if value is False:
+                return False
+            self.levels.append(len(self.trail))
+            self.decisions.append((literal, True))
+            if value is None:
+                self.enqueue(literal)
+            if not self.propagate():
+                return False
+        fixed = len(self.decisions)
+
+        next_variable = 0
+        while True:
+            if not self.propagate():
+
+                # Flip the most recent decision not yet flipped
+                while (len(self.decisions) > fixed
+                       and self.decisions[-1][1]):
+                    self.backtrack(len(self.decisions) - 1)
+                if len(self.decisions) == fixed:
+                    return False
+                literal = self.decisions[-1][0]
+                self.backtrack(len(self.decisions) - 1)
+                self.levels.append(len(self.trail))
+                self.decisions.append((-literal, True))
+                self.enqueue(-literal)
+                next_variable = 0
+                continue
+
+            # Branch on the next unassigned variable, trying false first
+            while (next_variable < len(self.order)
+                   and self.assignment[self.order[next_variable]] is not None):
+                next_variable += 1
+            if next_variable == len(self.order):
+                self.model = {
+                    v: bool(self.assignment[v])
+                    for v in range(1, self.count + 1)
+                }
+                return True
+            literal = -self.order[next_variable]
+            self.levels.append(len(self.trail))
+            self.decisions.append((literal, False))
+            self.enqueue(literal)
+
+
+def satisfiable(sentence):
+    """
+    Returns a satisfying model of `sentence`, as a dictionary from symbol
+    name to bool, or None if it is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf)
+    if not solver.solve():
+        return None
+    return {name: solver.model[v] for name, v in cnf.variables.items()}
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that knowledge
+    together with the negation of query is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not Solver(cnf).solve()
@@ -0,0 +1,350 @@
+import random
+import time
+
+import puzzle
+from bitparallel import truth_tables
+from hashcons import random_sentence
+from logic import (And, Biconditional, Implication, Not, Or, Sentence, Symbol,
+                   model_check)
+
+PROPERTY_SAMPLES = 5000
+PUZZLE_REPEATS = 1000
+BENCHMARK_SIZES = [10, 50, 200]
+SYMBOL_COUNT = 10
+
+
+def true():
+    """
+    Returns the constant true, as a new empty conjunction. Sentences are
+    mutable, so each simplification returns its own constant.
+    """
+    return And()
+
+
+def false():
+    """Returns the constant false, as a new empty disjunction."""
+    return Or()
+
+
+def is_true(sentence):
+    return isinstance(sentence, And) and not sentence.conjuncts
+
+
+def is_false(sentence):
+    return isinstance(sentence, Or) and not sentence.disjuncts
+
+
+def negate(sentence):
+    """Returns the negation of `sentence`, removing a double negation."""
+    if isinstance(sentence, Not):
+        return sentence.operand
+    if is_true(sentence):
+        return false()
+    if is_false(sentence):
+        return true()
+    return Not(sentence)
+
+
+def literal(sentence):
+    """
+    Returns `(name, value)` if `sentence` is a symbol or a negated symbol,
+    where `value` is the truth value that makes it true, and None otherwise.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence.name, True
+    if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+        return sentence.operand.name, False
+    return None
+
+
+def assume(sentence, name, value):
+    """
+    Returns `sentence`, simplified, with symbol `name` replaced by the
+    constant `value`.
+    """
+    if name not in sentence.symbols():
+        return sentence
+    if isinstance(sentence, Symbol):
+        return true() if value else false()
+    if isinstance(sentence, Not):
+        return negate(assume(sentence.operand, name, value))
+    if isinstance(sentence, And):
+        return conjunction([assume(c, name, value)
+                            for c in sentence.conjuncts])
+    if isinstance(sentence, Or):
+        return disjunction([assume(d, name, value)
+                            for d in sentence.disjuncts])
+    if isinstance(sentence, Implication):
+        return implication(assume(sentence.antecedent, name, value),
+                           assume(sentence.consequent, name, value))
+    return biconditional(assume(sentence.left, name, value),
+                         assume(sentence.right, name, value))
+
+
+def flatten(parts, kind, identity, absorbing):
+    """
+    Flattens nested sentences of class `kind` among `parts`, already
+    simplified, into one list, dropping constants equal to `identity` and
+    duplicates. Returns None if the result is `absorbing`, because a part
+    is that constant or two parts are complementary.
+    """
+    flat = dict()
+    stack = list(reversed(parts))
+    while stack:
+        part = stack.pop()
+        if isinstance(part, kind) and part != identity:
+            stack.extend(reversed(part.conjuncts if kind is And
+                                  else part.disjuncts))
+        elif part == absorbing:
+            return None
+        elif part != identity:
+            flat[part] = None
+    if any(negate(part) in flat for part in flat):
+        return None
+    return list(flat)
+
+
+def subsume(parts, inner):
+    """
+    Returns `parts`, the operands of a conjunction (or disjunction), less
+    every part implied by (or implying) another: viewing each part as the
+    set of operands of its own disjunction (or conjunction), of class
+    `inner`, a part whose set contains another's is redundant.
+    """
+    def operands(part):
+        if isinstance(part, inner):
+            return frozenset(part.disjuncts if inner is Or
+                             else part.conjuncts)
+        if inner is Or and isinstance(part, Implication):
+            return frozenset([negate(part.antecedent), part.consequent])
+        return frozenset([part])
+
+    sets = [operands(part) for part in parts]
+    return [part for i, part in enumerate(parts)
+            if not any(j != i and other <= sets[i]
+                       and (other != sets[i] or j < i)
+                       for j, other in enumerate(sets))]
+
+
+def conjunction(parts):
+    """Returns the simplified conjunction of simplified `parts`."""
+    parts = flatten(parts, And, true(), false())
+    if parts is None:
+        return false()
+    parts = subsume(parts, Or)
+    if len(parts) == 1:
+        return parts[0]
+    return And(*parts)
+
+
+def disjunction(parts):
+    """Returns the simplified disjunction of simplified `parts`."""
+    parts = flatten(parts, Or, false(), true())
+    if parts is None:
+        return true()
+    parts = subsume(parts, And)
+    if len(parts) == 1:
+        return parts[0]
+    return Or(*parts)
+
+
+def implication(antecedent, consequent):
+    """
+    Returns the simplified implication between simplified sentences. A
+    literal antecedent is assumed true in the consequent, and a literal
+    consequent false in the antecedent.
+    """
+    if is_true(antecedent):
+        return consequent
+    if is_false(consequent):
+        return negate(antecedent)
+    if is_false(antecedent) or is_true(consequent):
+        return true()
+    if antecedent == consequent:
+        return true()
+    if antecedent == negate(consequent):
+        return consequent
+
+    assumption = literal(antecedent)
+    if assumption is not None:
+        consequent = assume(consequent, *assumption)
+    else:
+        assumption = literal(consequent)
+        if assumption is not None:
+            name, value = assumption
+            antecedent = assume(antecedent, name, not value)
+    if (is_true(antecedent) or is_false(antecedent)
+            or is_true(consequent) or is_false(consequent)):
+        return implication(antecedent, consequent)
+    return Implication(antecedent, consequent)
+
+
+def biconditional(left, right):
+    """Returns the simplified biconditional between simplified sentences."""
+    if is_true(left):
+        return right
+    if is_true(right):
+        return left
+    if is_false(left):
+        return negate(right)
+    if is_false(right):
+        return negate(left)
+    if left == right:
+        return true()
+    if left == negate(right):
+        return false()
+    return Biconditional(left, right)
+
+
+def simplify(sentence):
+    """
+    Returns a sentence equivalent to `sentence`, simplified by flattening
+    nested conjunctions and disjunctions, removing double negations and
+    duplicates, folding the constants true and false, and removing
+    conjuncts and disjuncts subsumed by others. Literal antecedents of
+    implications are assumed in their consequents.
+    """
+    Sentence.validate(sentence)
+    if isinstance(sentence, Symbol):
+        return sentence
+    if isinstance(sentence, Not):
+        return negate(simplify(sentence.operand))
+    if isinstance(sentence, And):
+        return conjunction([simplify(c) for c in sentence.conjuncts])
+    if isinstance(sentence, Or):
+        return disjunction([simplify(d) for d in sentence.disjuncts])
+    if isinstance(sentence, Implication):
+        return implication(simplify(sentence.antecedent),
+                           simplify(sentence.consequent))
+    if isinstance(sentence, Biconditional):
+        return biconditional(simplify(sentence.left),
+                             simplify(sentence.right))
+    raise TypeError(f"cannot simplify {type(sentence).__name__}")
+
+
+def size(sentence):
+    """Returns the number of connectives and symbols in `sentence`."""
+    if isinstance(sentence, Symbol):
+        return 1
+    if isinstance(sentence, Not):
+        return 1 + size(sentence.operand)
+    if isinstance(sentence, And):
+        return 1 + sum(size(c) for c in sentence.conjuncts)
+    if isinstance(sentence, Or):
+        return 1 + sum(size(d) for d in sentence.disjuncts)
+    if isinstance(sentence, Implication):
+        return 1 + size(sentence.antecedent) + size(sentence.consequent)
+    return 1 + size(sentence.left) + size(sentence.right)
+
+
+def equivalent(first, second):
+    """Returns whether two sentences are true in exactly the same models."""
+    symbols = sorted(set.union(first.symbols(), second.symbols()))
+    return all(a == b for a, b in truth_tables([first, second], symbols))
+
+
+def check_equivalence(samples=PROPERTY_SAMPLES, seed=0):
+    """
+    Checks that `simplify` preserves equivalence and never grows a
+    sentence, on random sentences with constants among the leaves.
+    """
+    rng = random.Random(seed)
+    leaves = [Symbol(name) for name in "ABCDE"] + [true(), false()]
+    for _ in range(samples):
+        sentence = random_sentence(rng, leaves, rng.randint(1, 6))
+        simplified = simplify(sentence)
+        if not equivalent(sentence, simplified):
+            raise RuntimeError(f"{sentence} simplified to {simplified}")
+        if size(simplified) > size(sentence):
+            raise RuntimeError(f"{sentence} grew to {simplified}")
+
+
+def check_constants():
+    """
+    Checks that constants returned by `simplify` are not shared, by
+    changing a simplified tautology and contradiction and simplifying
+    another of each.
+    """
+    a, b = Symbol("A"), Symbol("B")
+    tautology = simplify(Or(a, Not(a)))
+    contradiction = simplify(And(a, Not(a)))
+    if not is_true(tautology) or not is_false(contradiction):
+        raise RuntimeError("constants not folded")
+    tautology.add(a)
+    contradiction.disjuncts.append(a)
+    if (not is_true(simplify(Or(b, Not(b))))
+            or not is_false(simplify(And(b, Not(b))))):
+        raise RuntimeError("changing a simplified constant changed another")
+
+
+def redundant_knowledge(count, seed=0):
+    """
+    Returns a satisfiable knowledge base of `count` random sentences, each
+    nested in the redundant structure simplification removes. Sentences
+    are kept only if true in one hidden random model, so the knowledge
+    base does not collapse to a contradiction.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"P{i}") for i in range(SYMBOL_COUNT)]
+    model = {symbol.name: rng.random() < 0.5 for symbol in symbols}
+    knowledge = And()
+    while len(knowledge.conjuncts) < count:
+        sentence = random_sentence(rng, symbols, 3)
+        if not sentence.evaluate(model):
+            continue
+        a, b = rng.sample(symbols, 2)
+        knowledge.add(And(Not(Not(sentence)), Or(sentence, And(sentence, a)),
+                          Implication(a, Or(a, b))))
+    return knowledge
+
+
+def benchmark(knowledge, query, repeat=1):
+    """
+    Returns the time taken by `repeat` calls of `model_check` on
+    `knowledge` and on its simplification, and checks that both give the
+    same answer.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        expected = model_check(knowledge, query)
+    original = time.perf_counter() - start
+
+    simplified = simplify(knowledge)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if model_check(simplified, query) != expected:
+            raise RuntimeError("simplified knowledge gives a different answer")
+    return original, time.perf_counter() - start
+
+
+def main():
+    start = time.perf_counter()
+    check_equivalence()
+    check_constants()
+    print(f"Equivalence preserved on {PROPERTY_SAMPLES} random sentences "
+          f"({time.perf_counter() - start:.2f}s)")
+
+    for name, knowledge in [("Puzzle 0", puzzle.knowledge0),
+                            ("Puzzle 1", puzzle.knowledge1),
+                            ("Puzzle 2", puzzle.knowledge2),
+                            ("Puzzle 3", puzzle.knowledge3)]:
+        original, simplified = benchmark(knowledge, puzzle.AKnight,
+                                         PUZZLE_REPEATS)
+        print(f"{name}: size {size(knowledge)} -> "
+              f"{size(simplify(knowledge))}, {PUZZLE_REPEATS} model_checks "
+              f"{original:.3f}s -> {simplified:.3f}s "
+              f"({original / simplified:.1f}x)")
+
+    for count in BENCHMARK_SIZES:
+        knowledge = redundant_knowledge(count)
+        # A valid query, so that every model is checked
+        query = Or(Symbol("P0"), Not(Symbol("P0")))
+        original, simplified = benchmark(knowledge, query)
+        print(f"{count} redundant sentences: size {size(knowledge)} -> "
+              f"{size(simplify(knowledge))}, model_check "
+              f"{original:.3f}s -> {simplified:.3f}s "
+              f"({original / simplified:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import pagerank
+from generate import MODELS, generate_corpus, write_corpus
+
+SIZES = [10, 100, 300]
+SAMPLES = 10000
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py output.json [pages ...]")
+    sizes = [int(size) for size in sys.argv[2:]] or SIZES
+    results = run_benchmarks(sizes)
+    with open(sys.argv[1], "w") as f:
+        json.dump(results, f, indent=2)
+    for result in results:
+        print(f"{result['model']} n={result['pages']}:")
+        for name, measurement in result["functions"].items():
+            line = (f"  {name}: {measurement['seconds']:.4f}s, "
+                    f"peak {measurement['peak_bytes'] / 1024:.0f} KiB")
+            if "max_error" in measurement:
+                line += f", max error {measurement['max_error']:.2e}"
+            print(line)
+
+
+def measure(function, *args):
+    """
+    Call `function(*args)` and return its result, the wall time in seconds
+    and the peak memory traced while it ran, in bytes.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def accuracy(ranks, reference):
+    """
+    Return the maximum absolute and total L1 error of `ranks`
+    against `reference`.
+    """
+    errors = [abs(ranks.get(page, 0) - rank) for page, rank in reference.items()]
+    return max(errors), sum(errors)
+
+
+def reference_pagerank(corpus, damping_factor):
+    """
+    Return the exact PageRank values of `corpus`, by solving the linear
+    system the ranks satisfy with a dense solver, independently of the
+    iterative solvers being measured. Pages with no links link to every
+    page. Memory is quadratic in the number of pages.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    n = len(pages)
+    transitions = np.zeros((n, n))
+    for page, links in corpus.items():
+        if links:
+            for link in links:
+                transitions[index[link], index[page]] = 1 / len(links)
+        else:
+            transitions[:, index[page]] = 1 / n
+    ranks = np.linalg.solve(np.eye(n) - damping_factor * transitions,
+                            np.full(n, (1 - damping_factor) / n))
+    return dict(zip(pages, ranks.tolist()))
+
+
+def transition_models(corpus, damping_factor):
+    """
+    Compute the transition model of every page of `corpus`.
+    """
+    for page in corpus:
+        pagerank.transition_model(corpus, page, damping_factor)
+
+
+def benchmark_corpus(corpus, samples=SAMPLES):
+    """
+    Write `corpus` to a temporary directory and measure `crawl`,
+    `transition_model` (over every page), `sample_pagerank` and
+    `iterate_pagerank` on it. Ranks are compared against the exact ranks
+    from `reference_pagerank`.
+    """
+    damping_factor = pagerank.DAMPING
+    reference = reference_pagerank(corpus, damping_factor)
+    functions = dict()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(corpus, directory)
+        crawled, seconds, peak = measure(pagerank.crawl, directory)
+        if crawled != corpus:
+            raise RuntimeError("crawl does not reproduce generated corpus")
+        functions["crawl"] = {"seconds": seconds, "peak_bytes": peak}
+
+    _, seconds, peak = measure(transition_models, corpus, damping_factor)
+    functions["transition_model"] = {"seconds": seconds, "peak_bytes": peak}
+
+    for name, function, args in [
+        ("sample_pagerank", pagerank.sample_pagerank,
+         (corpus, damping_factor, samples)),
+        ("iterate_pagerank", pagerank.iterate_pagerank,
+         (corpus, damping_factor))
+    ]:
+        ranks, seconds, peak = measure(function, *args)
+        max_error, total_error = accuracy(ranks, reference)
+        functions[name] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "max_error": max_error,
+            "l1_error": total_error
+        }
+    return functions
+
+
+def run_benchmarks(sizes=SIZES, models=MODELS, samples=SAMPLES, seed=0):
+    """
+    Benchmark every model in `models` at every corpus size in `sizes`.
+    Return a list of JSON-serialisable results.
+    """
+    random.seed(seed)
+    results = []
+    for model in models:
+        for size in sizes:
+            corpus = generate_corpus(size, model, seed=seed)
+            results.append({
+                "model": model,
+                "pages": size,
+                "links": sum(len(links) for links in corpus.values()),
+                "samples": samples,
+                "functions": benchmark_corpus(corpus, samples)
+            })
+    return results
+
+
+if __name__ == "__main__":
+    main()
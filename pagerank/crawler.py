@@ -0,0 +1,157 @@
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+LINK_PATTERN = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+CHUNK_SIZE = 64 * 1024
+INDEX_FILENAME = ".pagerank-index.json"
+INDEX_VERSION = 1
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python crawler.py corpus")
+    corpus = crawl(sys.argv[1])
+    for page in sorted(corpus):
+        print(f"  {page}: {', '.join(sorted(corpus[page]))}")
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of `href` targets of every `<a>` tag in the file at `path`.
+
+    The file is read `chunk_size` characters at a time. Text after the last
+    complete match is carried into the next chunk, so tags split across a
+    chunk boundary are still found.
+    """
+    links = set()
+    carry = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer = carry + chunk
+            end = 0
+            for match in LINK_PATTERN.finditer(buffer):
+                links.add(match.group(1))
+                end = match.end()
+            if not chunk:
+                break
+
+            # Only an unfinished "<a" tag can still produce a match, so keep
+            # the tail from the first one (or the last one, if the tail has
+            # grown past a chunk) and drop everything else
+            tail = buffer[end:]
+            start = tail.find("<a")
+            if start == -1:
+                carry = tail[-1:]
+            else:
+                if len(tail) - start > chunk_size:
+                    start = tail.rfind("<a")
+                carry = tail[start:]
+    return links
+
+
+def load_index(path):
+    """
+    Load a link index written by `save_index`.
+    Return an empty index if the file is missing, unreadable or stale.
+    """
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return dict()
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return dict()
+    return index.get("files", dict())
+
+
+def save_index(path, files):
+    """
+    Atomically write the link index `files` to `path`.
+    """
+    temporary = f"{path}.tmp"
+    try:
+        with open(temporary, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": files}, f)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def crawl(directory, workers=None, index_path=True, processes=False,
+          chunk_size=CHUNK_SIZE):
+    """
+    Parse a directory of HTML pages and check for links to other pages.
+    Return a dictionary where each key is a page, and values are
+    a set of all other pages in the corpus that are linked to by the page,
+    exactly as `pagerank.crawl` does.
+
+    Files are parsed in a pool of `workers` threads (or processes, if
+    `processes` is true). The links extracted from each file are cached in
+    an on-disk index keyed by file name, modification time and size, so
+    only new or modified files are parsed again on the next run.
+    `index_path` is the location of the index; True stores it inside
+    `directory` and None disables caching. If the index cannot be written,
+    the crawl still succeeds without updating it.
+    """
+    if index_path is True:
+        index_path = os.path.join(directory, INDEX_FILENAME)
+    index = load_index(index_path) if index_path else dict()
+
+    # Split the corpus into files whose cached links are still valid and
+    # files that have to be parsed
+    entries = dict()
+    stale = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".html") or not entry.is_file():
+            continue
+        stat = entry.stat()
+        cached = index.get(entry.name)
+        if (cached is not None and cached["mtime"] == stat.st_mtime_ns
+                and cached["size"] == stat.st_size):
+            entries[entry.name] = cached
+        else:
+            entries[entry.name] = {
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "links": None
+            }
+            stale.append(entry.name)
+
+    # Parse the stale files in parallel
+    if stale:
+        paths = [os.path.join(directory, filename) for filename in stale]
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with executor(max_workers=workers) as pool:
+            results = pool.map(
+                extract_links, paths, [chunk_size] * len(paths), chunksize=16
+            )
+            for filename, links in zip(stale, results):
+                entries[filename]["links"] = sorted(links)
+
+    # The index is only a cache, so a corpus that cannot be written to,
+    # such as a read-only one, is crawled without it
+    if index_path and (stale or set(index) != set(entries)):
+        try:
+            save_index(index_path, entries)
+        except OSError:
+            pass
+
+    # Only include links to other pages in the corpus
+    pages = dict()
+    for filename, entry in entries.items():
+        pages[filename] = set(
+            link for link in entry["links"]
+            if link in entries and link != filename
+        )
+
+    return pages
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import random
+import sys
+
+MODELS = ["power-law", "web"]
+LINKS = 4
+DANGLING = 0.1
+COPY_PROBABILITY = 0.6
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{title}</title>
+    </head>
+    <body>
+        <h1>{title}</h1>
+
+        <div>Links:</div>
+        <ul>
+{items}
+        </ul>
+    </body>
+</html>
+"""
+LINK_TEMPLATE = """            <li><a href="{page}">{title}</a></li>"""
+
+
+def main():
+    if len(sys.argv) not in [3, 4, 5]:
+        sys.exit("Usage: python generate.py directory pages [model] [dangling]")
+    directory = sys.argv[1]
+    pages = int(sys.argv[2])
+    model = sys.argv[3] if len(sys.argv) > 3 else "power-law"
+    dangling = float(sys.argv[4]) if len(sys.argv) > 4 else DANGLING
+    if model not in MODELS:
+        sys.exit(f"Model must be one of: {', '.join(MODELS)}")
+    corpus = generate_corpus(pages, model, dangling_fraction=dangling)
+    write_corpus(corpus, directory)
+    links = sum(len(links) for links in corpus.values())
+    print(f"Wrote {pages} pages with {links} links to {directory}")
+
+
+def page_name(i):
+    return f"{i}.html"
+
+
+def power_law_graph(n, links, rng):
+    """
+    Return a corpus of `n` pages built by preferential attachment: each new
+    page links to up to `links` earlier pages, chosen with probability
+    proportional to their in-degree plus one, so in-degrees follow a
+    power law.
+    """
+    corpus = {page_name(0): set()}
+
+    # Every page appears once, plus once more per incoming link
+    targets = [page_name(0)]
+    for i in range(1, n):
+        page = page_name(i)
+        corpus[page] = set(
+            rng.choice(targets) for _ in range(min(links, i))
+        )
+        targets.extend(sorted(corpus[page]))
+        targets.append(page)
+    return corpus
+
+
+def web_graph(n, links, rng, copy_probability=COPY_PROBABILITY):
+    """
+    Return a corpus of `n` pages built by the copying model of Kleinberg et
+    al.: each new page picks an earlier prototype page, and each of its
+    `links` links is copied from the prototype with probability
+    `copy_probability`, or else points to a uniformly random earlier page.
+    This yields power-law in-degrees together with many shared
+    neighbourhoods, as on the web.
+    """
+    corpus = {page_name(0): set()}
+    for i in range(1, n):
+        prototype = sorted(corpus[page_name(rng.randrange(i))])
+        links_of_page = set()
+        for j in range(min(links, i)):
+            if j < len(prototype) and rng.random() < copy_probability:
+                links_of_page.add(prototype[j])
+            else:
+                links_of_page.add(page_name(rng.randrange(i)))
+        corpus[page_name(i)] = links_of_page
+    return corpus
+
+
+def generate_corpus(n, model="power-law", links=LINKS,
+                    dangling_fraction=DANGLING, seed=0):
+    """
+    Return a random corpus of `n` pages in the format returned by `crawl`.
+
+    `model` is one of `MODELS`. A `dangling_fraction` of pages, chosen at
+    random, have their links removed. Since both models only link to
+    earlier pages, a few links back from earlier pages are then added so
+    the graph is not acyclic.
+    """
+    rng = random.Random(seed)
+    if model == "power-law":
+        corpus = power_law_graph(n, links, rng)
+    elif model == "web":
+        corpus = web_graph(n, links, rng)
+    else:
+        raise ValueError(f"unknown model {model!r}")
+
+    pages = list(corpus)
+    for _ in range(n // 2):
+        page, link = rng.choice(pages), rng.choice(pages)
+        if page != link:
+            corpus[page].add(link)
+
+    for page in rng.sample(pages, int(n * dangling_fraction)):
+        corpus[page] = set()
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """
+    Write `corpus` to `directory` as one HTML file per page, in the format
+    of the example corpora.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page, links in corpus.items():
+        title = page[:-len(".html")]
+        items = "\n".join(
+            LINK_TEMPLATE.format(page=link, title=link[:-len(".html")])
+            for link in sorted(links)
+        )
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(PAGE_TEMPLATE.format(title=title, items=items))
+
+
+if __name__ == "__main__":
+    main()
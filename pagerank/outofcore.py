@@ -0,0 +1,248 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from generate import generate_corpus
+from pagerank import DAMPING, crawl
+from solvers import MAX_ITERATIONS, TOLERANCE
+
+EDGE_DTYPE = np.dtype([("target", "<i4"), ("source", "<i4")])
+CHUNK_EDGES = 1 << 22
+BENCHMARK_NODES = 10 ** 6
+BENCHMARK_EDGES = 10 ** 7
+CONVERSION_PAGES = 250000
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--benchmark":
+        benchmark(int(float(sys.argv[2])))
+        return
+    if len(sys.argv) == 2 and sys.argv[1] == "--benchmark":
+        benchmark()
+        return
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python outofcore.py corpus | --benchmark [edges]")
+
+    corpus = crawl(sys.argv[1])
+    with tempfile.TemporaryDirectory() as directory:
+        write_edge_file(corpus, directory)
+        pages = load_pages(directory)
+        ranks, residuals = mmap_pagerank(directory, DAMPING)
+        print(f"PageRank Results from Memory-Mapped Iteration "
+              f"({len(residuals)} sweeps)")
+        for i in sorted(range(len(pages)), key=lambda i: pages[i]):
+            print(f"  {pages[i]}: {ranks[i]:.4f}")
+
+
+def write_header(directory, nodes, edges):
+    """
+    Write the node and edge counts of the graph stored in `directory`.
+    """
+    with open(os.path.join(directory, "graph.json"), "w") as f:
+        json.dump({"nodes": nodes, "edges": edges}, f)
+
+
+def read_header(directory):
+    """
+    Return the (nodes, edges) counts of the graph stored in `directory`.
+    """
+    with open(os.path.join(directory, "graph.json")) as f:
+        header = json.load(f)
+    return header["nodes"], header["edges"]
+
+
+def load_pages(directory):
+    """
+    Return the list of page names of the graph stored in `directory`,
+    in node index order.
+    """
+    with open(os.path.join(directory, "pages.txt")) as f:
+        return f.read().splitlines()
+
+
+def write_edge_file(corpus, directory, chunk_edges=CHUNK_EDGES):
+    """
+    Convert `corpus` into an on-disk graph in `directory`:
+
+        * `pages.txt`, the page names, one per line, in node index order,
+        * `edges.bin`, (target, source) pairs of little-endian int32 node
+          indices sorted by target, and
+        * `graph.json`, the node and edge counts.
+
+    Edges are packed page by page into one preallocated array of 8 bytes
+    per edge, with no Python object per edge, and written out
+    `chunk_edges` at a time.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    with open(os.path.join(directory, "pages.txt"), "w") as f:
+        for page in pages:
+            f.write(f"{page}\n")
+
+    # Pack each edge into one int64 key, target in the high half, so a
+    # plain in-place sort orders the edges by target and then source
+    keys = np.empty(sum(len(links) for links in corpus.values()),
+                    dtype=np.int64)
+    position = 0
+    for page, links in corpus.items():
+        targets = np.fromiter(map(index.__getitem__, links), dtype=np.int64,
+                              count=len(links))
+        keys[position:position + len(links)] = (targets << 32) | index[page]
+        position += len(links)
+    keys.sort()
+
+    with open(os.path.join(directory, "edges.bin"), "wb") as f:
+        for start in range(0, len(keys), chunk_edges):
+            key = keys[start:start + chunk_edges]
+            chunk = np.empty(len(key), dtype=EDGE_DTYPE)
+            chunk["target"] = key >> 32
+            chunk["source"] = key & 0xFFFFFFFF
+            chunk.tofile(f)
+    write_header(directory, len(pages), len(keys))
+
+
+def write_random_edge_file(directory, nodes, edges, seed=0,
+                           chunk_edges=CHUNK_EDGES):
+    """
+    Write a random graph with `nodes` nodes and about `edges` edges to
+    `directory` in the format of `write_edge_file`, without ever holding
+    more than `chunk_edges` edges in memory.
+
+    Targets are generated in ascending blocks, so the file comes out
+    sorted without an external sort. Sources are skewed towards low node
+    indices, giving a heavy-tailed out-degree.
+    """
+    rng = np.random.default_rng(seed)
+    with open(os.path.join(directory, "pages.txt"), "w") as f:
+        for i in range(nodes):
+            f.write(f"{i}.html\n")
+
+    written = 0
+    blocks = max(1, -(-edges // chunk_edges))
+    bounds = np.linspace(0, nodes, blocks + 1).astype(np.int64)
+    with open(os.path.join(directory, "edges.bin"), "wb") as f:
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            count = int(round(edges * (stop - start) / nodes))
+            chunk = np.empty(count, dtype=EDGE_DTYPE)
+            chunk["target"] = rng.integers(start, stop, count)
+            chunk["source"] = (nodes * rng.random(count) ** 3).astype(np.int64)
+            chunk = chunk[chunk["target"] != chunk["source"]]
+            chunk.sort(order=["target", "source"])
+            chunk.tofile(f)
+            written += len(chunk)
+    write_header(directory, nodes, written)
+
+
+def mmap_pagerank(directory, damping_factor, tolerance=TOLERANCE,
+                  max_iterations=MAX_ITERATIONS, chunk_edges=CHUNK_EDGES):
+    """
+    Return PageRank values for the graph stored in `directory` by
+    `write_edge_file`, as a NumPy array indexed like `load_pages`, and the
+    list of per-sweep residuals.
+
+    The edge file is memory-mapped and streamed `chunk_edges` edges at a
+    time, so peak memory is a few rank vectors of length N plus one chunk,
+    regardless of the number of edges. Pages with no links spread their
+    rank over the whole graph, and iteration stops once the L1 distance
+    between successive rank vectors is at most `tolerance`.
+    """
+    nodes, count = read_header(directory)
+    if not nodes:
+        return np.zeros(0), []
+    if count:
+        edges = np.memmap(os.path.join(directory, "edges.bin"),
+                          dtype=EDGE_DTYPE, mode="r", shape=(count,))
+    else:
+        edges = np.zeros(0, dtype=EDGE_DTYPE)
+
+    # Out-degree in one streaming pass
+    outdegree = np.zeros(nodes, dtype=np.int64)
+    for start in range(0, count, chunk_edges):
+        outdegree += np.bincount(edges["source"][start:start + chunk_edges],
+                                 minlength=nodes)
+    dangling = outdegree == 0
+    inverse = np.zeros(nodes)
+    inverse[~dangling] = 1 / outdegree[~dangling]
+
+    ranks = np.full(nodes, 1 / nodes)
+    residuals = []
+    for _ in range(max_iterations):
+        shares = ranks * inverse
+        new_ranks = np.full(
+            nodes, ((1 - damping_factor)
+                    + damping_factor * ranks[dangling].sum()) / nodes
+        )
+
+        # Targets are sorted, so each chunk only touches a contiguous range
+        for start in range(0, count, chunk_edges):
+            chunk = edges[start:start + chunk_edges]
+            targets = chunk["target"]
+            low, high = int(targets[0]), int(targets[-1]) + 1
+            new_ranks[low:high] += damping_factor * np.bincount(
+                targets - low, weights=shares[chunk["source"]],
+                minlength=high - low
+            )
+
+        residual = float(np.abs(new_ranks - ranks).sum())
+        residuals.append(residual)
+        ranks = new_ranks
+        if residual <= tolerance:
+            break
+
+    return ranks, residuals
+
+
+def benchmark(edges=BENCHMARK_EDGES, nodes=None, pages=CONVERSION_PAGES):
+    """
+    Time conversion of a generated corpus of `pages` pages to an edge
+    file, then memory-mapped PageRank on a random graph with `edges`
+    edges, and report peak traced memory of each.
+    """
+    corpus = generate_corpus(pages, seed=0)
+    links = sum(len(links) for links in corpus.values())
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_edge_file(corpus, directory)
+        converted = time.perf_counter() - start
+
+        # Tracing slows allocation down, so memory is measured separately
+        tracemalloc.start()
+        write_edge_file(corpus, directory)
+        conversion_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    del corpus
+
+    nodes = nodes or max(1, min(BENCHMARK_NODES, edges // 10))
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_random_edge_file(directory, nodes, edges)
+        generated = time.perf_counter() - start
+        edges = read_header(directory)[1]
+        size = os.path.getsize(os.path.join(directory, "edges.bin"))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        ranks, residuals = mmap_pagerank(directory, DAMPING)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    print(f"Converted corpus of {pages} pages, {links} links in "
+          f"{converted:.2f}s (peak traced memory "
+          f"{conversion_peak / 2 ** 20:.1f} MiB, "
+          f"{conversion_peak / max(1, links):.1f} bytes per link)")
+    print(f"Nodes: {nodes}, edges: {edges} ({size / 2 ** 20:.1f} MiB on disk)")
+    print(f"Generated edge file in {generated:.2f}s")
+    print(f"PageRank: {len(residuals)} sweeps in {elapsed:.2f}s "
+          f"({elapsed / len(residuals):.3f}s per sweep)")
+    print(f"Peak traced memory: {peak / 2 ** 20:.1f} MiB")
+    print(f"Sum of ranks: {ranks.sum():.6f}")
+
+
+if __name__ == "__main__":
+    main()
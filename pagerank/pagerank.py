@@ -123,28 +123,6 @@ def sample_pagerank(corpus, damping_factor, n):
 
     return pageRanks
 
-class Page():
-    def __init__(self,pageName,linkList,corpus):
-        self.pageName = pageName
-        self.linkList = linkList
-        self.linkList = linkList
-        self.pageRank = 1 / len(corpus)
-        #If linkList variable is empty, add one for each page in corpus.
-        if len(linkList) == 0:
-            for pg in corpus.keys():
-                self.linkList.append(pg)
-
-    def updatePageRank(self,corpus,pageList,damping_factor):
-
-        #Calculate sum of pageRank modifiers over i
-        self.sum = 0
-        for page in pageList:
-            self.sum += (page.pageRank/len(page.linkList))
-        
-        #Set new pageRank
-        self.pageRank = ((1-damping_factor)/len(corpus))+(damping_factor*self.sum)
-
-
 def iterate_pagerank(corpus, damping_factor):
     """
     Return PageRank values for each page by iteratively updating
@@ -153,46 +131,17 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    #Create list of Page classes
-    corpusPageList = []
-    for key, value in corpus.items():
-        newPage = Page(pageName=key,linkList=list(value),corpus=corpus)
-        corpusPageList.append(newPage)
-
-    #Iterate through Pages, updating Page Ranks. Break if checker = True
-    checker = False
-    while not checker:
-        for targetPage in corpusPageList:
-
-            #Set checker to True and record old pageRank
-            checker=True
-            oldPR = targetPage.pageRank
 
-            #Initalise list of linked pages for pageRank calculation
-            listOfLinkedPages = []
-
-            #Iterate through pages again to look for link to the target page
-            for checkPage in corpusPageList:
-                if targetPage.pageName in checkPage.linkList:
-
-                    #If link is found, add page to list of linked pages
-                    listOfLinkedPages.append(checkPage)
-
-            #Call the updatePageRank function with the list of linked pages
-            targetPage.updatePageRank(corpus,listOfLinkedPages,damping_factor)
-
-            #Record new pageRank. If difference is more than 0.001, set checker to False
-            newPR = targetPage.pageRank
-            if abs(oldPR-newPR) > 0.001:
-                checker = False
-
-    #Parse finished list of Page objects into pageRank dictionary
-    outputDict = {}
-    for page in corpusPageList:
-        outputDict[page.pageName] = page.pageRank
+    The iteration is the power iteration in `solvers`, run until the L1
+    change between sweeps is below `solvers.TOLERANCE`.
+    """
+    # A real import cycle: solvers does `from pagerank import DAMPING,
+    # crawl`, which fails at import time if this module imports solvers
+    # first, so solvers is only imported once both modules are loaded
+    from solvers import pagerank
 
-    return outputDict
+    ranks, _ = pagerank(corpus, damping_factor)
+    return ranks
 
 if __name__ == "__main__":
     main()
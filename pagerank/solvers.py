@@ -0,0 +1,392 @@
+import random
+import sys
+from collections import deque
+
+from pagerank import DAMPING, crawl
+
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+CHECK_SIZES = [100, 2000, 20000]
+CHECK_CHANGES = 3
+
+
+def main():
+    if len(sys.argv) == 2 and sys.argv[1] == "--check":
+        check_incremental()
+        return
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python solvers.py corpus [method] | --check")
+    corpus = crawl(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) == 3 else "jacobi"
+    if method not in METHODS:
+        sys.exit(f"Method must be one of: {', '.join(METHODS)}")
+    ranks, residuals = pagerank(corpus, DAMPING, method=method)
+    print(f"PageRank Results from {method} ({len(residuals)} sweeps)")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def build_graph(corpus):
+    """
+    Convert `corpus` into integer-indexed adjacency lists.
+
+    Return a tuple (pages, inlinks, outdegree), where `pages` is the sorted
+    list of page names, `inlinks[i]` lists the indices of pages linking to
+    page i and `outdegree[i]` is the number of links on page i. Pages with no
+    links are treated as linking to every page, as in `transition_model`.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    inlinks = [[] for _ in pages]
+    outdegree = [0] * len(pages)
+    for page, links in corpus.items():
+        i = index[page]
+        outdegree[i] = len(links)
+        for link in links:
+            inlinks[index[link]].append(i)
+    return pages, inlinks, outdegree
+
+
+def jacobi_sweep(graph, damping_factor, ranks):
+    """
+    Return the rank list produced by one Jacobi sweep over `graph`: every
+    page is updated from the previous sweep's ranks.
+    """
+    pages, inlinks, outdegree = graph
+    n = len(pages)
+
+    # Each page spreads its rank evenly over its links; dangling pages
+    # spread theirs over the whole corpus
+    shares = [
+        ranks[i] / outdegree[i] if outdegree[i] else 0
+        for i in range(n)
+    ]
+    base = ((1 - damping_factor)
+            + damping_factor * sum(
+                ranks[i] for i in range(n) if not outdegree[i]
+            )) / n
+    return [
+        base + damping_factor * sum(shares[j] for j in inlinks[i])
+        for i in range(n)
+    ]
+
+
+def gauss_seidel_sweep(graph, damping_factor, ranks):
+    """
+    Return the rank list produced by one Gauss-Seidel sweep over `graph`:
+    every page is updated from the newest ranks available, including those
+    already updated earlier in the same sweep.
+    """
+    pages, inlinks, outdegree = graph
+    n = len(pages)
+    ranks = list(ranks)
+    dangling = sum(ranks[i] for i in range(n) if not outdegree[i])
+
+    for i in range(n):
+        rank = ((1 - damping_factor) + damping_factor * dangling) / n
+        rank += damping_factor * sum(
+            ranks[j] / outdegree[j] for j in inlinks[i]
+        )
+        if not outdegree[i]:
+            dangling += rank - ranks[i]
+        ranks[i] = rank
+
+    # In-place updates do not preserve the total, so renormalise
+    total = sum(ranks)
+    return [rank / total for rank in ranks]
+
+
+def aitken_extrapolation(history):
+    """
+    Return the componentwise Aitken delta-squared extrapolation of the
+    last three iterates in `history`.
+    """
+    x0, x1, x2 = history[-3:]
+    ranks = []
+    for a, b, c in zip(x0, x1, x2):
+        denominator = c - 2 * b + a
+        if abs(denominator) > 1e-15:
+            ranks.append(c - (c - b) ** 2 / denominator)
+        else:
+            ranks.append(c)
+    return ranks
+
+
+def quadratic_extrapolation(history):
+    """
+    Return the quadratic extrapolation of the last four iterates in
+    `history`, as described by Kamvar et al. in "Extrapolation Methods for
+    Accelerating PageRank Computations".
+    """
+    x0, x1, x2, x3 = history[-4:]
+    y1 = [b - a for a, b in zip(x0, x1)]
+    y2 = [b - a for a, b in zip(x0, x2)]
+    y3 = [b - a for a, b in zip(x0, x3)]
+
+    # Solve the least-squares problem [y1 y2] g = -y3 by normal equations
+    a11 = sum(u * u for u in y1)
+    a12 = sum(u * v for u, v in zip(y1, y2))
+    a22 = sum(v * v for v in y2)
+    b1 = -sum(u * w for u, w in zip(y1, y3))
+    b2 = -sum(v * w for v, w in zip(y2, y3))
+    determinant = a11 * a22 - a12 * a12
+    if abs(determinant) < 1e-30:
+        return list(x3)
+    g1 = (b1 * a22 - b2 * a12) / determinant
+    g2 = (a11 * b2 - a12 * b1) / determinant
+    g3 = 1
+
+    beta0 = g1 + g2 + g3
+    beta1 = g2 + g3
+    beta2 = g3
+    return [
+        beta0 * a + beta1 * b + beta2 * c
+        for a, b, c in zip(x1, x2, x3)
+    ]
+
+
+# Sweep used by each method, and the extrapolation applied periodically.
+# Quadratic extrapolation every 10 sweeps saves 15-30% of the
+# sweeps on generated web graphs of 2000 pages. Componentwise Aitken
+# extrapolation needs more sweeps than plain Jacobi there at every period
+# tried (5 to 40): 38 instead of 31 at a period of 10. It is kept so the
+# residuals can be compared.
+METHODS = {
+    "jacobi": (jacobi_sweep, None),
+    "gauss-seidel": (gauss_seidel_sweep, None),
+    "aitken": (jacobi_sweep, aitken_extrapolation),
+    "quadratic": (jacobi_sweep, quadratic_extrapolation)
+}
+EXTRAPOLATION_PERIOD = 10
+
+
+def power_iteration(graph, damping_factor, ranks, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, method="jacobi"):
+    """
+    Iterate `method` (a key of `METHODS`) on `graph`, as returned by
+    `build_graph`, starting from the rank list `ranks`.
+
+    Stop once the L1 distance between successive rank vectors is at most
+    `tolerance`. Return the final rank list and the list of per-sweep
+    residuals.
+    """
+    try:
+        sweep, extrapolate = METHODS[method]
+    except KeyError:
+        raise ValueError(f"unknown method {method!r}")
+
+    residuals = []
+    history = [ranks]
+    for iteration in range(1, max_iterations + 1):
+        new_ranks = sweep(graph, damping_factor, ranks)
+
+        residual = sum(abs(new - old) for new, old in zip(new_ranks, ranks))
+        residuals.append(residual)
+        ranks = new_ranks
+        if residual <= tolerance:
+            break
+
+        # Periodically replace the iterate with an extrapolated estimate,
+        # renormalised and clipped back onto the probability simplex
+        if extrapolate is not None:
+            history = history[-3:] + [ranks]
+            if iteration % EXTRAPOLATION_PERIOD == 0 and len(history) == 4:
+                extrapolated = [max(rank, 0) for rank in extrapolate(history)]
+                total = sum(extrapolated)
+                ranks = [rank / total for rank in extrapolated]
+                history = [ranks]
+
+    return ranks, residuals
+
+
+def pagerank(corpus, damping_factor, start=None, tolerance=TOLERANCE,
+             max_iterations=MAX_ITERATIONS, method="jacobi"):
+    """
+    Return PageRank values for each page of `corpus` and the list of
+    per-sweep residuals.
+
+    `start` is an optional dictionary of initial rank values. Pages missing
+    from it start at 1 / N and the vector is renormalised to sum to 1, so the
+    ranks of a previous run make a warm start. Without it every page starts
+    at 1 / N. `method` selects the solver; see `METHODS`.
+    """
+    graph = build_graph(corpus)
+    pages = graph[0]
+    if not pages:
+        return dict(), []
+
+    if start is None:
+        ranks = [1 / len(pages)] * len(pages)
+    else:
+        ranks = [start.get(page, 1 / len(pages)) for page in pages]
+        total = sum(ranks)
+        ranks = [rank / total for rank in ranks]
+
+    ranks, residuals = power_iteration(
+        graph, damping_factor, ranks, tolerance, max_iterations, method
+    )
+    return dict(zip(pages, ranks)), residuals
+
+
+def apply_changes(corpus, added_pages=(), removed_pages=(),
+                  added_links=(), removed_links=()):
+    """
+    Update `corpus` in place.
+
+    `added_pages` and `removed_pages` are iterables of page names;
+    `added_links` and `removed_links` are iterables of (page, link) pairs.
+    Links to removed pages are dropped, and links are only kept if both
+    ends are in the corpus.
+    """
+    removed_pages = set(removed_pages)
+    for page in removed_pages:
+        corpus.pop(page, None)
+    for links in corpus.values():
+        links -= removed_pages
+
+    for page in added_pages:
+        corpus.setdefault(page, set())
+    for page, link in removed_links:
+        if page in corpus:
+            corpus[page].discard(link)
+    for page, link in added_links:
+        if page in corpus and link in corpus and link != page:
+            corpus[page].add(link)
+
+
+def incremental_pagerank(corpus, ranks, damping_factor, added_pages=(),
+                         removed_pages=(), added_links=(), removed_links=(),
+                         tolerance=TOLERANCE):
+    """
+    Apply a change set to `corpus` (see `apply_changes`) and return the
+    updated PageRank values and the number of link updates made.
+
+    `ranks` are the PageRank values of `corpus` before the change. They
+    are updated by residual push, which only touches the pages the change
+    affects. The ranks are proportional to the scores `y` solving
+
+        y = (1 - d) + d * sum of y[j] / outdegree[j] over links j -> i,
+
+    in which dangling pages pass nothing on and every page receives the
+    same (1 - d) whatever the number of pages, so after normalising the
+    ranks by the number of pages and the dangling rank, a change only
+    puts residual on new pages and on pages whose in-links changed. Each
+    push moves a page's residual into its score and passes `d` times it
+    on over its links, until no page holds residual above a threshold
+    small enough that the normalised ranks are within about `tolerance`.
+    """
+    d = damping_factor
+    removed_pages = set(removed_pages)
+    added_pages = [page for page in added_pages if page not in corpus]
+
+    # Out-links of every page whose links the change may alter
+    touched = {page for page, _ in added_links}
+    touched.update(page for page, _ in removed_links)
+    touched.update(page for page, links in corpus.items()
+                   if links & removed_pages)
+    touched.update(removed_pages)
+    old_links = {page: set(corpus[page])
+                 for page in touched if page in corpus}
+
+    # Scores equivalent to the old ranks
+    n = len(corpus)
+    dangling = sum(ranks[page] for page in corpus if not corpus[page])
+    scale = n * (1 - d) / ((1 - d) + d * dangling) if n else 0
+    scores = {page: rank * scale for page, rank in ranks.items()}
+
+    apply_changes(corpus, added_pages, removed_pages,
+                  added_links, removed_links)
+    if not corpus:
+        return dict(), 0
+
+    # Residual left by each changed page's flow moving to its new links
+    residual = dict.fromkeys(added_pages, 1 - d)
+    for page, links in old_links.items():
+        score = scores.get(page, 0)
+        if links:
+            for link in links:
+                residual[link] = (residual.get(link, 0)
+                                  - d * score / len(links))
+        new_links = corpus.get(page, ())
+        for link in new_links:
+            residual[link] = (residual.get(link, 0)
+                              + d * score / len(new_links))
+    for page in removed_pages:
+        scores.pop(page, None)
+        residual.pop(page, None)
+    for page in added_pages:
+        scores[page] = 0
+
+    total = sum(scores.values())
+    threshold = tolerance * (1 - d) * total / len(corpus) / 2
+    queue = deque(page for page, r in residual.items() if abs(r) > threshold)
+    queued = set(queue)
+    updates = 0
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        r = residual.pop(page)
+        scores[page] += r
+        total += r
+        links = corpus[page]
+        updates += 1 + len(links)
+        for link in links:
+            residual[link] = residual.get(link, 0) + d * r / len(links)
+            if link not in queued and abs(residual[link]) > threshold:
+                queued.add(link)
+                queue.append(link)
+
+    return {page: score / total for page, score in scores.items()}, updates
+
+
+def check_incremental(sizes=CHECK_SIZES, changes=CHECK_CHANGES, seed=0):
+    """
+    Check that `incremental_pagerank` agrees with a from-scratch run to
+    within the tolerance, for random change sets on generated corpora of
+    each size in `sizes`, and report the work done by each, in sweeps.
+    """
+    from generate import MODELS, generate_corpus
+
+    rng = random.Random(seed)
+    for model in MODELS:
+        for size in sizes:
+            corpus = generate_corpus(size, model, seed=seed)
+            ranks, _ = pagerank(corpus, DAMPING)
+
+            pages = sorted(corpus)
+            added = [f"new{i}.html" for i in range(changes)]
+            removed = rng.sample(pages, changes)
+            kept = sorted(set(pages) - set(removed)) + added
+            added_links = [(rng.choice(kept), rng.choice(kept))
+                           for _ in range(changes * 4)]
+            removed_links = [
+                (page, link) for page in rng.sample(pages, changes)
+                for link in sorted(corpus[page])[:1]
+            ]
+
+            incremental, updates = incremental_pagerank(
+                corpus, ranks, DAMPING, added, removed,
+                added_links, removed_links
+            )
+            full, cold = pagerank(corpus, DAMPING)
+            difference = sum(abs(incremental[page] - full[page])
+                             for page in full)
+
+            # Each power iteration stops within d / (1 - d) times its last
+            # residual of the exact ranks, and the push within about
+            # `TOLERANCE` of the ranks it started from
+            bound = 2 * TOLERANCE * DAMPING / (1 - DAMPING) + TOLERANCE
+            if set(incremental) != set(full) or difference > bound:
+                raise RuntimeError(
+                    f"{model} n={size}: incremental ranks differ by "
+                    f"{difference:.2e}"
+                )
+
+            # A sweep updates every page from every link
+            sweep = len(corpus) + sum(len(links) for links in corpus.values())
+            print(f"{model} n={size}: L1 difference {difference:.1e}, "
+                  f"push {updates / sweep:.2f} sweeps of work, "
+                  f"{len(cold)} sweeps from scratch")
+
+if __name__ == "__main__":
+    main()